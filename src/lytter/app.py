@@ -1,35 +1,52 @@
 """Simple FastAPI application for Last.fm stats."""
 
+import asyncio
+import contextlib
 import datetime
+import functools
 import json
 import math
 import os
 import re
 import sqlite3
+import threading
 import time as _time
 import unicodedata
-from collections import Counter, OrderedDict
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import accumulate
 from pathlib import Path
 from typing import TypedDict
 from urllib.parse import quote
 
+import jinja2
 import pylast
 import requests
 import uvicorn
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from dotenv import load_dotenv
 from rapidfuzz import fuzz, process
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from lytter.db import DB_NAME, library_counts
 
 try:
     import lyricsgenius as _lyricsgenius
 except ImportError:
     _lyricsgenius = None
 
+try:
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
+
 try:
     import pandas as pd
-    import plotly.express as px
     import plotly.graph_objects as go
     from fastapi import BackgroundTasks, FastAPI, HTTPException, Query, Request
-    from fastapi.responses import HTMLResponse
+    from fastapi.responses import HTMLResponse, JSONResponse, Response
     from fastapi.staticfiles import StaticFiles
     from fastapi.templating import Jinja2Templates
 except ImportError as e:
@@ -40,34 +57,113 @@ load_dotenv()
 
 # Get package directory for templates and static files
 _PKG_DIR = Path(__file__).parent
-DB_NAME = Path("music.db")
 
 # Configuration
 API_KEY = os.environ.get("API_KEY", "")
 API_SECRET = os.environ.get("API_SECRET", "")
 USER_NAME = os.environ.get("USER_NAME", "")
 PASSWORD = os.environ.get("PASSWORD", "")
-PASSWORD_HASH = pylast.md5(PASSWORD) if PASSWORD else ""
 UPDATE_PASSWORD = os.environ.get("UPDATE_PASSWORD")
+# Minutes between in-process incremental updates; unset or 0 leaves updates
+# to lytter-cron / lytter-background
+UPDATE_INTERVAL_MINUTES = int(os.environ.get("UPDATE_INTERVAL_MINUTES") or 0)
+
+_network_lock = threading.Lock()
+
+
+@functools.cache
+def _build_network() -> pylast.LastFMNetwork:
+    return pylast.LastFMNetwork(
+        api_key=API_KEY,
+        api_secret=API_SECRET,
+        username=USER_NAME,
+        password_hash=pylast.md5(PASSWORD) if PASSWORD else "",
+    )
+
+
+def get_network() -> pylast.LastFMNetwork:
+    """Return the shared pylast network, creating it on first use.
+
+    With a username and password hash pylast fetches a session key from
+    Last.fm when the network is constructed, so building it at import time
+    made every process start (and every page that never talks to Last.fm)
+    pay for that round-trip. The lock makes sure concurrent first requests
+    only build it once.
+    """
+    with _network_lock:
+        return _build_network()
+
+
+@functools.cache
+def _lastfm_user(network: pylast.LastFMNetwork) -> pylast.User:
+    """Return the configured Last.fm user, reused across requests."""
+    return network.get_user(USER_NAME)
+
+
+async def _scheduled_update() -> None:
+    """Fetch new scrobbles on a worker thread, keeping the event loop free."""
+    try:
+        await asyncio.to_thread(GetScrobbles().get_scrobbles)
+    except Exception as e:
+        print(f"Scheduled update failed: {e}")
+
+
+@contextlib.asynccontextmanager
+async def _lifespan(app: FastAPI):
+    """Schedule incremental updates inside the server when configured.
+
+    Running them here reuses the already imported app and its connections
+    instead of starting a second interpreter that imports everything and
+    runs ``init_db`` again for each update. The cached database connections
+    are closed on shutdown.
+    """
+    scheduler = None
+    if UPDATE_INTERVAL_MINUTES:
+        scheduler = AsyncIOScheduler()
+        scheduler.add_job(
+            _scheduled_update,
+            "interval",
+            minutes=UPDATE_INTERVAL_MINUTES,
+            id="scrobble_update",
+            coalesce=True,
+            max_instances=1,
+            misfire_grace_time=300,
+        )
+        scheduler.start()
+        app.state.scheduler = scheduler
+    try:
+        yield
+    finally:
+        if scheduler is not None:
+            scheduler.shutdown(wait=False)
+        close_db_connections()
 
-# pylast network (will fail at runtime if env vars not set)
-network = pylast.LastFMNetwork(
-    api_key=API_KEY,
-    api_secret=API_SECRET,
-    username=USER_NAME,
-    password_hash=PASSWORD_HASH,
-)
 
 app = FastAPI(
-    title="Last.fm Stats", description="Personal Last.fm statistics dashboard"
+    title="Last.fm Stats",
+    description="Personal Last.fm statistics dashboard",
+    lifespan=_lifespan,
 )
 
 # Setup templates and static files
-templates = Jinja2Templates(directory=str(_PKG_DIR / "templates"))
+# Templates ship with the package and only change on deploy, so skip the
+# per-render mtime check and keep every compiled template in the cache
+_jinja_env = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(str(_PKG_DIR / "templates")),
+    autoescape=jinja2.select_autoescape(),
+    auto_reload=False,
+    cache_size=-1,
+)
+templates = Jinja2Templates(env=_jinja_env)
 
 # Add custom Jinja2 filter for URL encoding
 templates.env.filters["urlencode"] = lambda s: quote(str(s), safe="")
 
+# Compile everything at startup (after the filters are registered) so the
+# first request to each page does not pay for parsing
+for _template_name in _jinja_env.list_templates(extensions=["html"]):
+    _jinja_env.get_template(_template_name)
+
 app.mount("/static", StaticFiles(directory=str(_PKG_DIR / "static")), name="static")
 
 # Constants
@@ -75,7 +171,10 @@ CONSECUTIVE_SCROBBLES_THRESHOLD = 50
 # Minimum valid scrobble timestamp: 2000-01-01 00:00:00 UTC
 # Last.fm launched in 2002; anything before 2000 is a corrupt epoch artifact.
 MINIMUM_VALID_TIMESTAMP = 946684800
-MUSICBRAINZ_USER_AGENT = "lytter/1.0 (https://github.com/engeir/lytter)"
+USER_AGENT = "lytter/1.0 (https://github.com/engeir/lytter)"
+LASTFM_API_URL = "https://ws.audioscrobbler.com/2.0/"
+# Keep-alive connections to Last.fm; also the cap on parallel page fetches
+LASTFM_MAX_CONNECTIONS = 8
 MUSICBRAINZ_SEARCH_URL = "https://musicbrainz.org/ws/2/recording/"
 DEEZER_SEARCH_URL = "https://api.deezer.com/search"
 SPOTIFY_TOKEN_URL = "https://accounts.spotify.com/api/token"
@@ -87,6 +186,32 @@ METADATA_RETRY_DAYS = 30
 
 _spotify_token: dict[str, object] = {}  # keys: access_token, expires_at
 
+
+def _make_lastfm_session() -> requests.Session:
+    """Create a keep-alive HTTP session for paged Last.fm API requests.
+
+    Reusing one connection pool avoids a TCP + TLS handshake per page, and
+    transient 429/5xx responses are retried with backoff. Last.fm asks API
+    clients to send an identifying User-Agent, so it is set once here.
+    """
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    retries = Retry(
+        total=5, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]
+    )
+    session.mount(
+        "https://",
+        HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=LASTFM_MAX_CONNECTIONS,
+            max_retries=retries,
+        ),
+    )
+    return session
+
+
+lastfm_session = _make_lastfm_session()
+
 _VARIANT_RE = re.compile(
     r"\s*[-–(]\s*"
     r"(remaster(ed)?|demo|radio\s+edit|acoustic|extended|"
@@ -101,11 +226,17 @@ _FEAT_PAREN_RE = re.compile(
 _FEAT_BARE_RE = re.compile(r"\b(?:feat|ft|featuring)\.?(?=\s|$)", re.IGNORECASE)
 
 
+_FIRST_COMBINING_MARK = "\u0300"
+
+
+@functools.lru_cache(maxsize=50_000)
 def normalize_text(text: str) -> str:
     """Normalize Unicode text by removing accents and diacritics.
 
     This allows searching for "u" to match "ü", "Lut" to match "Lüt", etc.
     Uses NFD (Canonical Decomposition) + filtering of combining characters.
+    Results are memoized, since search normalizes the same artist, album and
+    track names over and over.
 
     Parameters
     ----------
@@ -124,10 +255,20 @@ def normalize_text(text: str) -> str:
     >>> normalize_text("café")
     'cafe'
     """
+    # Plain ASCII has nothing to decompose or strip
+    if text.isascii():
+        return text
     # NFD = Canonical Decomposition (e.g., "ü" -> "u" + combining diaeresis)
     nfd = unicodedata.normalize("NFD", text)
-    # Remove combining characters (accents, diacritics, etc.)
-    return "".join(char for char in nfd if unicodedata.category(char) != "Mn")
+    # Remove combining characters (accents, diacritics, etc.). No code point
+    # below U+0300 is a combining mark, so base letters skip the category lookup
+    return "".join(
+        [
+            char
+            for char in nfd
+            if char < _FIRST_COMBINING_MARK or unicodedata.category(char) != "Mn"
+        ]
+    )
 
 
 def normalize_name(s: str, field: str = "artist") -> str:
@@ -154,8 +295,7 @@ def normalize_name(s: str, field: str = "artist") -> str:
     # 3. Lowercase
     s = s.lower()
     # 4. Strip diacritics
-    nfd = unicodedata.normalize("NFD", s)
-    s = "".join(c for c in nfd if unicodedata.category(c) != "Mn")
+    s = normalize_text(s)
     # 5. Feat. normalization — track only
     if field == "track":
         s = _FEAT_PAREN_RE.sub(r"feat. \1", s)
@@ -166,6 +306,96 @@ def normalize_name(s: str, field: str = "artist") -> str:
     return s
 
 
+# Most frequent spelling of an artist, used as its display name
+CANONICAL_ARTIST_SQL = (
+    "SELECT artist FROM musiclibrary WHERE artist_key = ? "
+    "GROUP BY artist ORDER BY COUNT(*) DESC LIMIT 1"
+)
+
+SCROBBLE_INSERT_SQL = """
+    INSERT OR IGNORE INTO musiclibrary
+    (artist, artist_mbid, album, album_mbid, track, track_mbid, timestamp,
+     artist_key, album_key, track_key)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def scrobble_row(scrobble: dict, timestamp: int) -> tuple:
+    """Turn a Last.fm recent-tracks entry into a ``musiclibrary`` row.
+
+    The tuple matches the column order of ``SCROBBLE_INSERT_SQL``.
+    ``timestamp`` is passed in because callers already parse it to filter
+    scrobbles before paying for the normalisation.
+    """
+    artist = scrobble["artist"]["#text"]
+    album = scrobble["album"]["#text"]
+    track = scrobble["name"]
+    return (
+        artist,
+        scrobble["artist"]["mbid"],
+        album,
+        scrobble["album"]["mbid"],
+        track,
+        scrobble["mbid"],
+        timestamp,
+        normalize_name(artist, "artist"),
+        normalize_name(album or "", "album"),
+        normalize_name(track, "track"),
+    )
+
+
+# Cached connections keyed by (thread id, database path), see get_db_connection
+_db_connections: dict[tuple[int, str], sqlite3.Connection] = {}
+_db_connections_lock = threading.Lock()
+
+
+def get_db_connection(db_name: Path | str | None = None) -> sqlite3.Connection:
+    """Return this thread's SQLite connection, opening it on first use.
+
+    Connections are kept per thread and database path, so SQLite's statement
+    and page caches stay warm across requests instead of being rebuilt on
+    every connect. Use it as ``with get_db_connection() as conn:`` — the
+    block commits or rolls back but leaves the connection open. They stay
+    open until ``close_db_connections`` is called.
+
+    The WAL journal mode is persistent and set once by ``init_db``; the
+    pragmas here only last for the connection, so they are applied when it
+    is opened. ``synchronous=NORMAL`` is safe under WAL and skips the fsync
+    on each commit. The page cache is kept small because there can be one
+    connection per worker thread; the memory map is shared between them.
+    """
+    path = str(DB_NAME if db_name is None else db_name)
+    key = (threading.get_ident(), path)
+    conn = _db_connections.get(key)
+    if conn is None:
+        # The app issues well over the default 128 distinct statements, and
+        # the connection lives for the thread, so keep them all prepared.
+        # Only the owning thread uses it; check_same_thread is off so that
+        # close_db_connections can close it from another thread.
+        conn = sqlite3.connect(path, cached_statements=512, check_same_thread=False)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-4096")  # 4 MiB
+        conn.execute("PRAGMA mmap_size=268435456")  # 256 MiB, shared page cache
+        with _db_connections_lock:
+            _db_connections[key] = conn
+    return conn
+
+
+def close_db_connections(db_name: Path | str | None = None) -> None:
+    """Close the cached connections for ``db_name``, or all of them.
+
+    Only call this when no queries are running, e.g. on shutdown or between
+    tests; threads that ask for a connection afterwards open a new one.
+    """
+    path = None if db_name is None else str(db_name)
+    with _db_connections_lock:
+        keys = [key for key in _db_connections if path is None or key[1] == path]
+        connections = [_db_connections.pop(key) for key in keys]
+    for conn in connections:
+        conn.close()
+
+
 def backfill_keys(conn: sqlite3.Connection) -> None:
     """Populate artist_key/album_key/track_key for rows where they are NULL."""
     cursor = conn.cursor()
@@ -186,9 +416,72 @@ def backfill_keys(conn: sqlite3.Connection) -> None:
     conn.commit()
 
 
+# (summary key, musiclibrary column, SQL test that a key value counts) for the
+# distinct counts kept in stats_summary; mirrors the COUNT(DISTINCT ...)
+# queries in library_counts
+_DISTINCT_SUMMARIES = (
+    ("unique_artists", "artist_key", "{} IS NOT NULL"),
+    ("unique_tracks", "track_key", "{} IS NOT NULL"),
+    ("unique_albums", "album_key", "{} != ''"),
+)
+
+
+def _stats_summary_triggers() -> list[str]:
+    """Build the triggers that keep ``stats_summary`` in step with ``musiclibrary``.
+
+    Inserts, deletes and key backfills are all covered. A distinct count only
+    changes when the first row with a key value arrives or the last one
+    leaves; the ``NOT EXISTS`` probes are index lookups, so the cost per
+    write stays constant. Every write also bumps ``data_version``, which
+    response caches use to notice new data.
+    """
+    bump = "UPDATE stats_summary SET v = v + 1 WHERE k = 'data_version';"
+    on_insert = [
+        bump,
+        "UPDATE stats_summary SET v = v + 1 WHERE k = 'total_scrobbles';",
+    ]
+    on_delete = [
+        bump,
+        "UPDATE stats_summary SET v = v - 1 WHERE k = 'total_scrobbles';",
+    ]
+    on_update = [bump]
+    for key, col, counts in _DISTINCT_SUMMARIES:
+        new_first = (
+            f"{counts.format(f'NEW.{col}')} AND NOT EXISTS "
+            f"(SELECT 1 FROM musiclibrary WHERE {col} = NEW.{col} AND id != NEW.id)"
+        )
+        old_last = (
+            f"{counts.format(f'OLD.{col}')} AND NOT EXISTS "
+            f"(SELECT 1 FROM musiclibrary WHERE {col} = OLD.{col})"
+        )
+        changed = f"OLD.{col} IS NOT NEW.{col}"
+        on_insert.append(
+            f"UPDATE stats_summary SET v = v + 1 WHERE k = '{key}' AND {new_first};"
+        )
+        on_delete.append(
+            f"UPDATE stats_summary SET v = v - 1 WHERE k = '{key}' AND {old_last};"
+        )
+        on_update += [
+            f"UPDATE stats_summary SET v = v - 1 WHERE k = '{key}' AND {changed} AND {old_last};",
+            f"UPDATE stats_summary SET v = v + 1 WHERE k = '{key}' AND {changed} AND {new_first};",
+        ]
+    body = "\n    ".join
+    return [
+        "CREATE TRIGGER stats_summary_insert AFTER INSERT ON musiclibrary\n"
+        f"BEGIN\n    {body(on_insert)}\nEND",
+        "CREATE TRIGGER stats_summary_delete AFTER DELETE ON musiclibrary\n"
+        f"BEGIN\n    {body(on_delete)}\nEND",
+        "CREATE TRIGGER stats_summary_update\n"
+        "AFTER UPDATE OF artist_key, album_key, track_key ON musiclibrary\n"
+        f"BEGIN\n    {body(on_update)}\nEND",
+    ]
+
+
 def init_db():
     """Initialize database with table if it doesn't exist."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
+        # Persistent: readers no longer block on writers and vice versa
+        conn.execute("PRAGMA journal_mode=WAL")
         cursor = conn.cursor()
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS musiclibrary (
@@ -211,10 +504,13 @@ def init_db():
         for col in ("artist_key", "album_key", "track_key"):
             if col not in existing_cols:
                 cursor.execute(f"ALTER TABLE musiclibrary ADD COLUMN {col} TEXT")  # noqa: S608
+        # Covers per-artist history and first/last-heard lookups without
+        # touching the table; supersedes the old single-column idx_artist_key
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_artist_key
-            ON musiclibrary(artist_key)
+            CREATE INDEX IF NOT EXISTS idx_artist_key_timestamp
+            ON musiclibrary(artist_key, timestamp)
         """)
+        cursor.execute("DROP INDEX IF EXISTS idx_artist_key")
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_artist_album_key
             ON musiclibrary(artist_key, album_key)
@@ -223,6 +519,16 @@ def init_db():
             CREATE INDEX IF NOT EXISTS idx_artist_track_key
             ON musiclibrary(artist_key, track_key)
         """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_artist_track
+            ON musiclibrary(artist, track)
+        """)
+        # Album track listings filter on the raw artist/album names; with
+        # track included they never touch the table
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_artist_album
+            ON musiclibrary(artist, album, track)
+        """)
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS track_durations (
                 artist TEXT NOT NULL,
@@ -284,7 +590,58 @@ def init_db():
                 fetched_at INTEGER NOT NULL
             )
         """)
+        # Per-key lookups for the stats_summary triggers below
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_track_key
+            ON musiclibrary(track_key)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_album_key
+            ON musiclibrary(album_key)
+        """)
+        # Library-wide counts kept current by triggers, so the dashboard reads
+        # four rows instead of running COUNT(DISTINCT ...) over every scrobble
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS stats_summary (
+                k TEXT PRIMARY KEY,
+                v INTEGER NOT NULL
+            )
+        """)
+        # Recreated every time so changes to the trigger bodies reach old DBs
+        for name in ("insert", "delete", "update"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS stats_summary_{name}")
+        for trigger in _stats_summary_triggers():
+            cursor.execute(trigger)
+        cursor.execute(
+            "INSERT OR IGNORE INTO stats_summary (k, v) VALUES ('data_version', 0)"
+        )
+        if not cursor.execute(
+            "SELECT 1 FROM stats_summary WHERE k = 'total_scrobbles'"
+        ).fetchone():
+            cursor.execute("""
+                INSERT INTO stats_summary (k, v)
+                SELECT 'total_scrobbles', COUNT(*) FROM musiclibrary
+                UNION ALL
+                SELECT 'unique_artists', COUNT(DISTINCT artist_key) FROM musiclibrary
+                UNION ALL
+                SELECT 'unique_tracks', COUNT(DISTINCT track_key) FROM musiclibrary
+                UNION ALL
+                SELECT 'unique_albums', COUNT(DISTINCT album_key)
+                FROM musiclibrary WHERE album_key != ''
+            """)
         backfill_keys(conn)
+        # Give the planner row estimates to choose between the overlapping
+        # indexes above; later updates refresh them with PRAGMA optimize
+        # sqlite_stat1 only exists once ANALYZE has run, so check for it first
+        has_stats = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+        ).fetchone()
+        if has_stats:
+            has_stats = cursor.execute(
+                "SELECT 1 FROM sqlite_stat1 WHERE tbl = 'musiclibrary'"
+            ).fetchone()
+        if not has_stats:
+            cursor.execute("ANALYZE musiclibrary")
 
 
 init_db()
@@ -439,7 +796,7 @@ def _mb_name_search(artist: str, track: str) -> int | None:
             "fmt": "json",
             "limit": "1",
         },
-        headers={"User-Agent": MUSICBRAINZ_USER_AGENT},
+        headers={"User-Agent": USER_AGENT},
         timeout=10,
     )
     if resp.status_code == 200:  # noqa: PLR2004
@@ -461,7 +818,7 @@ def _deezer_search(artist: str, track: str) -> int | None:
     resp = requests.get(
         DEEZER_SEARCH_URL,
         params={"q": f'track:"{track}" artist:"{artist}"', "limit": "1"},
-        headers={"User-Agent": MUSICBRAINZ_USER_AGENT},
+        headers={"User-Agent": USER_AGENT},
         timeout=10,
     )
     if resp.status_code == 200:  # noqa: PLR2004
@@ -531,7 +888,7 @@ def _fetch_duration_from_mb(artist: str, track: str, mbid: str | None) -> int |
 
     Returns duration in milliseconds, or None if not found anywhere.
     """
-    headers = {"User-Agent": MUSICBRAINZ_USER_AGENT}
+    headers = {"User-Agent": USER_AGENT}
     # 1. MusicBrainz MBID lookup
     if mbid:
         resp = requests.get(
@@ -574,7 +931,7 @@ def fetch_and_cache_durations(tracks: list[tuple[str, str, str | None]]) -> None
     Tries MusicBrainz MBID lookup, then MusicBrainz name search, then pylast.
     Uses INSERT OR REPLACE so retries can overwrite stale NULL entries.
     """
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
         for artist, track, mbid in tracks:
             duration_ms: int | None = None
@@ -584,7 +941,7 @@ def fetch_and_cache_durations(tracks: list[tuple[str, str, str | None]]) -> None
                 if duration_ms is None:
                     duration_ms = _fetch_duration_from_mb(artist, track, mbid)
                 if duration_ms is None:
-                    raw = network.get_track(artist, track).get_duration()
+                    raw = get_network().get_track(artist, track).get_duration()
                     duration_ms = int(raw) if raw else None
             except Exception:
                 pass
@@ -596,32 +953,49 @@ def fetch_and_cache_durations(tracks: list[tuple[str, str, str | None]]) -> None
             _time.sleep(1.1)  # MusicBrainz rate limit: 1 req/sec
 
 
+@functools.cache
+def _genius_client(token: str):
+    """Return a shared Genius client for ``token``.
+
+    The client holds its own HTTP session, so building it once keeps the
+    connection alive across background lyric fetches.
+    """
+    return _lyricsgenius.Genius(
+        token,
+        verbose=False,
+        remove_section_headers=False,
+        skip_non_songs=True,
+    )
+
+
 def fetch_and_cache_lyrics(artist: str, track: str) -> None:
     """Fetch lyrics for a track from Genius and cache in the database.
 
     Requires GENIUS_TOKEN environment variable. Stores NULL if not found so
-    the lookup is not retried until LYRICS_RETRY_DAYS have passed.
+    the lookup is not retried until LYRICS_RETRY_DAYS have passed. Returns
+    early if the track is already cached, e.g. when several page loads queued
+    the same background fetch.
     """
     genius_token = os.environ.get("GENIUS_TOKEN")
     if not genius_token or _lyricsgenius is None:
         return
+    with get_db_connection() as conn:
+        cached = conn.execute(
+            "SELECT 1 FROM lyrics WHERE artist = ? AND track = ?", (artist, track)
+        ).fetchone()
+    if cached:
+        return
 
-    genius = _lyricsgenius.Genius(
-        genius_token,
-        verbose=False,
-        remove_section_headers=False,
-        skip_non_songs=True,
-    )
     lyrics: str | None = None
     try:
-        song = genius.search_song(track, artist)
+        song = _genius_client(genius_token).search_song(track, artist)
         if song and song.lyrics:
             # lyricsgenius appends "X Embed" at the end — strip it
             raw = re.sub(r"\d*\s*Embed$", "", song.lyrics.strip()).strip()
             lyrics = raw or None
     except Exception:
         pass
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         conn.execute(
             "INSERT OR REPLACE INTO lyrics (artist, track, lyrics, fetched_at) VALUES (?, ?, ?, ?)",
             (artist, track, lyrics, int(_time.time())),
@@ -636,11 +1010,11 @@ def fetch_and_cache_artist_genres(artist: str) -> None:
     """
     tags: list[dict[str, object]] = []
     try:
-        top_tags = network.get_artist(artist).get_top_tags(limit=10)
+        top_tags = get_network().get_artist(artist).get_top_tags(limit=10)
         tags = [{"tag": str(t.item), "weight": int(t.weight)} for t in top_tags]
     except Exception:
         pass
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         conn.execute(
             "INSERT OR REPLACE INTO artist_genres (artist, tags, fetched_at) VALUES (?, ?, ?)",
             (artist, json.dumps(tags), int(_time.time())),
@@ -689,8 +1063,8 @@ def _compute_streaks(conn: sqlite3.Connection) -> tuple[int, int]:
     return current, longest
 
 
-def _get_dashboard_stats(conn: sqlite3.Connection) -> dict[str, object]:
-    """Query all dashboard summary statistics from an open DB connection.
+def _listening_time_stats(conn: sqlite3.Connection) -> dict[str, object]:
+    """Estimate total listening time from cached track durations.
 
     Parameters
     ----------
@@ -700,45 +1074,51 @@ def _get_dashboard_stats(conn: sqlite3.Connection) -> dict[str, object]:
     Returns
     -------
     dict[str, object]
-        Keys: total_scrobbles, unique_artists, unique_tracks, unique_albums,
-        total_listening_time, listening_time_known_tracks,
-        listening_time_total_tracks, current_streak, longest_streak.
+        Keys: total_listening_time, listening_time_known_tracks,
+        listening_time_total_tracks.
     """
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM musiclibrary")
-    total_scrobbles = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(DISTINCT artist_key) FROM musiclibrary")
-    unique_artists = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(DISTINCT track_key) FROM musiclibrary")
-    unique_tracks = cursor.fetchone()[0]
-    cursor.execute(
-        "SELECT COUNT(DISTINCT album_key) FROM musiclibrary WHERE album_key != ''"
-    )
-    unique_albums = cursor.fetchone()[0]
-
-    cursor.execute("""
+    rows = conn.execute("""
         SELECT COUNT(*) as plays, MAX(td.duration_ms) as duration_ms
         FROM musiclibrary m
         LEFT JOIN track_durations td ON td.artist = m.artist AND td.track = m.track
         GROUP BY m.artist_key, m.track_key
-    """)
-    rows = cursor.fetchall()
+    """).fetchall()
     total_ms = sum(row[0] * row[1] for row in rows if row[1])
     known_track_count = sum(1 for row in rows if row[1])
     total_track_count = len(rows)
     total_listening_time = format_listening_time(total_ms) if known_track_count > 0 else None
-    current_streak, longest_streak = _compute_streaks(conn)
-
     return {
-        "total_scrobbles": total_scrobbles,
-        "unique_artists": unique_artists,
-        "unique_tracks": unique_tracks,
-        "unique_albums": unique_albums,
         "total_listening_time": total_listening_time,
         "listening_time_known_tracks": known_track_count,
         "listening_time_total_tracks": total_track_count,
-        "current_streak": current_streak,
-        "longest_streak": longest_streak,
+    }
+
+
+def _streak_stats(conn: sqlite3.Connection) -> dict[str, int]:
+    """Wrap ``_compute_streaks`` in the dashboard stats shape."""
+    current_streak, longest_streak = _compute_streaks(conn)
+    return {"current_streak": current_streak, "longest_streak": longest_streak}
+
+
+def _get_dashboard_stats(conn: sqlite3.Connection) -> dict[str, object]:
+    """Query all dashboard summary statistics from an open DB connection.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Open database connection.
+
+    Returns
+    -------
+    dict[str, object]
+        Keys: total_scrobbles, unique_artists, unique_tracks, unique_albums,
+        total_listening_time, listening_time_known_tracks,
+        listening_time_total_tracks, current_streak, longest_streak.
+    """
+    return {
+        **library_counts(conn),
+        **_listening_time_stats(conn),
+        **_streak_stats(conn),
     }
 
 
@@ -773,6 +1153,9 @@ def fetch_and_cache_track_metadata(artist: str, track: str, mbid: str | None = N
     2. MusicBrainz MBID lookup (release_date) — if mbid provided and Spotify missed it
     3. Last.fm (global_listeners, global_plays)
 
+    The Last.fm lookup is independent of the other two, so it runs in a worker
+    thread while Spotify and MusicBrainz are queried.
+
     Always writes a row so the page stops retrying on failure.
     """
     release_date: str | None = None
@@ -781,51 +1164,61 @@ def fetch_and_cache_track_metadata(artist: str, track: str, mbid: str | None = N
     global_listeners: int | None = None
     global_plays: int | None = None
 
-    token = _spotify_get_token()
-    if token:
-        try:
-            resp = requests.get(
-                SPOTIFY_SEARCH_URL,
-                params={"q": f'track:"{track}" artist:"{artist}"', "type": "track", "limit": "1"},
-                headers={"Authorization": f"Bearer {token}"},
-                timeout=10,
-            )
-            if resp.status_code == 200:  # noqa: PLR2004
-                items = resp.json().get("tracks", {}).get("items", [])
-                if items:
-                    item = items[0]
-                    popularity = item.get("popularity")
-                    album = item.get("album", {})
-                    release_date = album.get("release_date")
-                    images = album.get("images", [])
-                    if images:
-                        album_art_url = images[0]["url"]
-        except Exception:
-            pass
+    def lastfm_global_stats() -> tuple[int | None, int | None]:
+        lfm_track = get_network().get_track(artist, track)
+        raw_listeners = lfm_track.get_listener_count()
+        raw_plays = lfm_track.get_playcount()
+        return (
+            int(raw_listeners) if raw_listeners else None,
+            int(raw_plays) if raw_plays else None,
+        )
+
+    # The with block waits for the Last.fm lookup; every source below
+    # swallows its own errors so the future is always read
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        lastfm_future = executor.submit(lastfm_global_stats)
 
-    if not release_date and mbid:
         try:
-            resp = requests.get(
-                f"https://musicbrainz.org/ws/2/recording/{mbid}?fmt=json",
-                headers={"User-Agent": MUSICBRAINZ_USER_AGENT},
-                timeout=10,
-            )
-            if resp.status_code == 200:  # noqa: PLR2004
-                release_date = resp.json().get("first-release-date")
-            _time.sleep(1.1)
+            token = _spotify_get_token()
+            if token:
+                resp = requests.get(
+                    SPOTIFY_SEARCH_URL,
+                    params={"q": f'track:"{track}" artist:"{artist}"', "type": "track", "limit": "1"},
+                    headers={"Authorization": f"Bearer {token}"},
+                    timeout=10,
+                )
+                if resp.status_code == 200:  # noqa: PLR2004
+                    items = resp.json().get("tracks", {}).get("items", [])
+                    if items:
+                        item = items[0]
+                        popularity = item.get("popularity")
+                        album = item.get("album", {})
+                        release_date = album.get("release_date")
+                        images = album.get("images", [])
+                        if images:
+                            album_art_url = images[0]["url"]
         except Exception:
             pass
 
+        if not release_date and mbid:
+            try:
+                resp = requests.get(
+                    f"https://musicbrainz.org/ws/2/recording/{mbid}?fmt=json",
+                    headers={"User-Agent": USER_AGENT},
+                    timeout=10,
+                )
+                if resp.status_code == 200:  # noqa: PLR2004
+                    release_date = resp.json().get("first-release-date")
+                _time.sleep(1.1)
+            except Exception:
+                pass
+
     try:
-        lfm_track = network.get_track(artist, track)
-        raw_listeners = lfm_track.get_listener_count()
-        raw_plays = lfm_track.get_playcount()
-        global_listeners = int(raw_listeners) if raw_listeners else None
-        global_plays = int(raw_plays) if raw_plays else None
+        global_listeners, global_plays = lastfm_future.result()
     except Exception:
         pass
 
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         conn.execute(
             """INSERT OR REPLACE INTO track_metadata
                (artist, track, release_date, popularity, album_art_url,
@@ -844,19 +1237,30 @@ def fetch_and_cache_artist_metadata(artist: str) -> None:
     bio: str | None = None
     similar: list[dict[str, object]] = []
     try:
-        lfm_artist = network.get_artist(artist)
-        raw_bio = lfm_artist.get_bio_summary()
-        if raw_bio:
-            # Strip HTML tags
-            bio = re.sub(r"<[^>]+>", "", raw_bio).strip() or None
-        similar_items = lfm_artist.get_similar(limit=5)
-        similar = [
-            {"artist": str(s.item), "match": round(float(s.match), 2)}
-            for s in similar_items
-        ]
+        lfm_artist = get_network().get_artist(artist)
     except Exception:
-        pass
-    with sqlite3.connect(DB_NAME) as conn:
+        lfm_artist = None
+    if lfm_artist is not None:
+        # Bio and similar artists are separate API calls; overlap them, and
+        # resolve each on its own so one failing call keeps the other result
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            bio_future = executor.submit(lfm_artist.get_bio_summary)
+            similar_future = executor.submit(lfm_artist.get_similar, limit=5)
+        try:
+            raw_bio = bio_future.result()
+            if raw_bio:
+                # Strip HTML tags
+                bio = re.sub(r"<[^>]+>", "", raw_bio).strip() or None
+        except Exception:
+            pass
+        try:
+            similar = [
+                {"artist": str(s.item), "match": round(float(s.match), 2)}
+                for s in similar_future.result()
+            ]
+        except Exception:
+            pass
+    with get_db_connection() as conn:
         conn.execute(
             "INSERT OR REPLACE INTO artist_metadata (artist, bio, similar_artists, fetched_at) VALUES (?, ?, ?, ?)",
             (artist, bio, json.dumps(similar), int(_time.time())),
@@ -864,11 +1268,25 @@ def fetch_and_cache_artist_metadata(artist: str) -> None:
 
 
 class GetScrobbles:
-    """Download and update your scrobbles."""
+    """Download and update your scrobbles.
+
+    Parameters
+    ----------
+    conn
+        Connection to read from and write to. Defaults to the calling
+        thread's cached connection from ``get_db_connection``.
+    """
 
-    def __init__(self):
+    def __init__(self, conn: sqlite3.Connection | None = None):
         self.pause_duration = 0.2
         self.method = "recenttracks"
+        self.max_workers = 4
+        # Rows to insert before committing; 0 commits after every page
+        self.batch_size = 0
+        self.conn = conn
+
+    def _connection(self) -> sqlite3.Connection:
+        return self.conn if self.conn is not None else get_db_connection()
 
     def save(self) -> None:
         """Save new scrobbles (incremental update)."""
@@ -880,12 +1298,48 @@ class GetScrobbles:
 
     def get_latest_timestamp(self) -> int:
         """Get the most recent timestamp from the database."""
-        with sqlite3.connect(DB_NAME) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT MAX(timestamp) FROM musiclibrary")
             result = cursor.fetchone()[0]
         return int(result) if result else 0
 
+    @staticmethod
+    def _existing_timestamps(
+        conn: sqlite3.Connection, timestamps: list[int]
+    ) -> set[int]:
+        """Return which of ``timestamps`` are already stored.
+
+        One indexed ``IN (...)`` lookup per page keeps memory flat instead of
+        loading every stored timestamp up front.
+        """
+        if not timestamps:
+            return set()
+        placeholders = ",".join("?" * len(timestamps))
+        return {
+            row[0]
+            for row in conn.execute(
+                f"SELECT timestamp FROM musiclibrary WHERE timestamp IN ({placeholders})",  # noqa: S608
+                timestamps,
+            )
+        }
+
+    @staticmethod
+    def _iter_pages(
+        executor: ThreadPoolExecutor,
+        fetch_page: Callable[[int], dict],
+        total_pages: int,
+        window: int,
+    ) -> Iterator[tuple[int, Future]]:
+        """Yield ``(page, future)`` in page order, keeping ``window`` fetches in flight."""
+        pending: deque[tuple[int, Future]] = deque()
+        next_page = 1
+        while pending or next_page <= total_pages:
+            while next_page <= total_pages and len(pending) < window:
+                pending.append((next_page, executor.submit(fetch_page, next_page)))
+                next_page += 1
+            yield pending.popleft()
+
     def get_scrobbles(
         self,
         limit: int = 200,
@@ -902,7 +1356,15 @@ class GetScrobbles:
         For incremental updates, this will only fetch new scrobbles since the last update.
         For full updates, this will fetch all scrobbles (use with caution).
         """
-        url = "https://ws.audioscrobbler.com/2.0/?method=user.get{}&user={}&api_key={}&limit={}&extended={}&page={}&format=json"
+        # Everything but the page number is fixed for the whole run
+        params = {
+            "method": f"user.get{self.method}",
+            "user": USER_NAME,
+            "api_key": API_KEY,
+            "limit": limit,
+            "extended": extended,
+            "format": "json",
+        }
 
         # Get the latest timestamp for incremental updates
         latest_timestamp = 0
@@ -916,10 +1378,9 @@ class GetScrobbles:
 
         # Make first request to get total pages
         try:
-            request_url = url.format(
-                self.method, USER_NAME, API_KEY, limit, extended, page
+            response = lastfm_session.get(
+                LASTFM_API_URL, params={**params, "page": page}, timeout=30
             )
-            response = requests.get(request_url, timeout=30)
             response.raise_for_status()
             data = response.json()
         except Exception as e:
@@ -928,7 +1389,7 @@ class GetScrobbles:
 
         total_pages = int(data[self.method]["@attr"]["totalPages"])
         if pages > 0:
-            total_pages = min([total_pages, pages])
+            total_pages = min(total_pages, pages)
 
         if not full:
             # For incremental updates, limit pages since newest scrobbles come first
@@ -937,27 +1398,51 @@ class GetScrobbles:
         else:
             print(f"Full update: {total_pages} total pages to retrieve")
 
-        with sqlite3.connect(DB_NAME) as conn:
+        # Space request starts ``pause_duration`` apart across the workers so
+        # parallel fetches stay within Last.fm's rate limit
+        pace_lock = threading.Lock()
+        next_start = _time.monotonic() + self.pause_duration
+
+        def fetch_page(page_: int) -> dict:
+            nonlocal next_start
+            if page_ == page:
+                return data  # Already fetched above to learn the page count
+            with pace_lock:
+                start = max(next_start, _time.monotonic())
+                next_start = start + self.pause_duration
+            _time.sleep(max(start - _time.monotonic(), 0))
+            response = lastfm_session.get(
+                LASTFM_API_URL, params={**params, "page": page_}, timeout=30
+            )
+            response.raise_for_status()
+            return response.json()
+
+        # Full updates walk every page, so keep a few requests in flight;
+        # incremental updates usually stop after the first page
+        window = self.max_workers if full else 1
+
+        with (
+            self._connection() as conn,
+            ThreadPoolExecutor(max_workers=window) as executor,
+        ):
             cursor = conn.cursor()
 
             new_scrobbles_count = 0
+            uncommitted = 0
             consecutive_old_scrobbles = 0
 
-            # Request each page of data
-            for page_ in range(1, int(total_pages) + 1):
+            # Process each page of data in order
+            for page_, future in self._iter_pages(
+                executor, fetch_page, int(total_pages), window
+            ):
                 print(f"Page {page_}/{total_pages}", end="\r")
                 try:
-                    request_url = url.format(
-                        self.method, USER_NAME, API_KEY, limit, extended, page_
-                    )
-                    response = requests.get(request_url, timeout=30)
-                    response.raise_for_status()
-                    scrobbles = response.json()
+                    scrobbles = future.result()
                 except Exception as e:
                     print(f"\nError fetching page {page_}: {e}")
                     continue
 
-                page_new_count = 0
+                valid = []
                 for scrobble in scrobbles[self.method]["track"]:
                     # Skip now playing tracks
                     if (
@@ -974,13 +1459,17 @@ class GetScrobbles:
                             f"({scrobble['artist']['#text']} - {scrobble['name']})"
                         )
                         continue
+                    valid.append((scrobble_timestamp, scrobble))
+
+                existing_timestamps = self._existing_timestamps(
+                    conn, [ts for ts, _ in valid]
+                )
 
+                page_rows = []
+                reached_existing = False
+                for scrobble_timestamp, scrobble in valid:
                     # Check if this exact scrobble already exists (always check, don't assume based on timestamp)
-                    cursor.execute(
-                        "SELECT 1 FROM musiclibrary WHERE timestamp = ?",
-                        (scrobble_timestamp,),
-                    )
-                    if cursor.fetchone():
+                    if scrobble_timestamp in existing_timestamps:
                         # This scrobble exists, but continue checking others (don't skip based on timestamp alone)
                         consecutive_old_scrobbles += 1
                         # Only stop after many consecutive existing scrobbles AND we're past our latest timestamp
@@ -990,46 +1479,46 @@ class GetScrobbles:
                             and latest_timestamp > 0
                             and scrobble_timestamp <= latest_timestamp
                         ):
-                            print(
-                                f"\nFound {consecutive_old_scrobbles} consecutive existing scrobbles beyond latest timestamp, stopping"
-                            )
-                            return new_scrobbles_count
+                            reached_existing = True
+                            break
                         continue
 
                     # Reset consecutive counter when we find a truly new scrobble
                     consecutive_old_scrobbles = 0
 
-                    # Insert new scrobble
+                    page_rows.append(scrobble_row(scrobble, scrobble_timestamp))
+
+                # Insert the whole page at once, committing every batch_size
+                # rows so long runs pay for fewer commits. Each page gets its
+                # own savepoint so a failing page does not take the earlier,
+                # still uncommitted pages of the batch down with it.
+                page_new_count = 0
+                if page_rows:
                     try:
-                        artist_raw = scrobble["artist"]["#text"]
-                        album_raw = scrobble["album"]["#text"]
-                        track_raw = scrobble["name"]
-                        cursor.execute(
-                            """
-                            INSERT INTO musiclibrary
-                            (artist, artist_mbid, album, album_mbid, track, track_mbid, timestamp,
-                             artist_key, album_key, track_key)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """,
-                            (
-                                artist_raw,
-                                scrobble["artist"]["mbid"],
-                                album_raw,
-                                scrobble["album"]["mbid"],
-                                track_raw,
-                                scrobble["mbid"],
-                                scrobble_timestamp,
-                                normalize_name(artist_raw, "artist"),
-                                normalize_name(album_raw, "album"),
-                                normalize_name(track_raw, "track"),
-                            ),
-                        )
-                        conn.commit()
-                        new_scrobbles_count += 1
-                        page_new_count += 1
+                        if not conn.in_transaction:
+                            conn.execute("BEGIN")
+                        conn.execute("SAVEPOINT scrobble_page")
+                        try:
+                            cursor.executemany(SCROBBLE_INSERT_SQL, page_rows)
+                        except sqlite3.Error:
+                            conn.execute("ROLLBACK TO scrobble_page")
+                            raise
+                        finally:
+                            conn.execute("RELEASE scrobble_page")
+                        page_new_count = cursor.rowcount
+                        uncommitted += page_new_count
+                        if uncommitted >= self.batch_size:
+                            conn.commit()
+                            new_scrobbles_count += uncommitted
+                            uncommitted = 0
                     except sqlite3.Error as e:
                         print(f"\nDatabase error: {e}")
-                        conn.rollback()
+
+                if reached_existing:
+                    print(
+                        f"\nFound {consecutive_old_scrobbles} consecutive existing scrobbles beyond latest timestamp, stopping"
+                    )
+                    break
 
                 # For incremental updates, if we found no new scrobbles on this page, likely done
                 if not full and page_new_count == 0:
@@ -1038,16 +1527,212 @@ class GetScrobbles:
                     )
                     break
 
+            # Leaving the ``with conn`` block commits the last partial batch
+            new_scrobbles_count += uncommitted
+
         print(f"\nUpdate complete! Added {new_scrobbles_count} new scrobbles.")
         return new_scrobbles_count
 
 
+def _empty_figure() -> dict:
+    """Return an empty Plotly figure dict.
+
+    ``go.Figure().to_dict()`` validates a whole figure and embeds the default
+    template (several KB of JSON) just to draw nothing; the bare dict renders
+    the same empty plot.
+    """
+    return {"data": [], "layout": {}}
+
+
+# Dark theme shared by the cumulative listening-history charts. Plain dicts so
+# the figures go straight to the JSON encoder instead of through plotly's validators.
+_HISTORY_LAYOUT = {
+    "title": {
+        "text": "Listening history",
+        "x": 0.5,
+        "font": {"family": "Open Sans", "size": 25},
+    },
+    "xaxis": {"title": {"text": "Time"}, "gridcolor": "#30363d", "color": "#f0f6fc"},
+    "yaxis": {"title": {"text": "Count"}, "gridcolor": "#30363d", "color": "#f0f6fc"},
+    "showlegend": True,
+    "font": {"color": "#f0f6fc"},
+    "paper_bgcolor": "#161b22",
+    "plot_bgcolor": "#161b22",
+}
+
+
+def _rolling_mean(values: list[float], window: int) -> list[float]:
+    """Centred rolling mean, matching pandas ``rolling(window, center=True, min_periods=1)``.
+
+    Parameters
+    ----------
+    values : list[float]
+        Series to smooth.
+    window : int
+        Window length; near the edges the mean is taken over the values that
+        fall inside the series.
+
+    Returns
+    -------
+    list[float]
+        Smoothed series, same length as ``values``.
+    """
+    prefix = [0.0, *accumulate(values)]
+    n = len(values)
+    means = []
+    for i in range(n):
+        lo = max(i - window // 2, 0)
+        hi = min(i - window // 2 + window, n)
+        means.append((prefix[hi] - prefix[lo]) / (hi - lo))
+    return means
+
+
+def _cumulative_history_figure(dates: list[str], counts: list[int]) -> dict:
+    """Build the cumulative listening-history line chart as a Plotly dict."""
+    return {
+        "data": [
+            {
+                "type": "scatter",
+                "mode": "lines",
+                "x": dates,
+                "y": counts,
+                "line": {"color": "#636efa"},
+                "hovertemplate": "date=%{x}<br>count=%{y}<extra></extra>",
+                "showlegend": False,
+            }
+        ],
+        "layout": _HISTORY_LAYOUT,
+    }
+
+
+def _data_version(conn: sqlite3.Connection) -> int | None:
+    """Return a counter that changes whenever ``musiclibrary`` is written.
+
+    ``None`` when the database has no ``stats_summary`` table (not set up by
+    ``init_db``), in which case callers should not cache.
+    """
+    try:
+        row = conn.execute(
+            "SELECT v FROM stats_summary WHERE k = 'data_version'"
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def _dumps_json(obj: object) -> str:
+    """Serialise a chart payload, with orjson when it is installed.
+
+    The stdlib fallback drops the default ``", "`` / ``": "`` padding, which
+    is a sizeable share of a long Plotly series.
+    """
+    if _orjson is not None:
+        return _orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"))
+
+
+@functools.lru_cache(maxsize=256)
+def _artist_history_json(db_name: str, artist: str, data_version: int) -> str:
+    """Return the serialised ``listening_history_db`` chart for a data version.
+
+    ``db_name`` and ``data_version`` are only part of the cache key: a new
+    scrobble bumps the version, so stale entries are simply never hit again.
+    """
+    return _dumps_json(CurrentStats().listening_history_db(artist))
+
+
+@functools.lru_cache(maxsize=64)
+def _versioned_json(
+    build: Callable[..., object],
+    db_name: str,
+    data_version: int,
+    time_bucket: int,
+    *args: object,
+) -> bytes:
+    """Return the encoded JSON body of ``build(*args)``.
+
+    Everything but ``args`` only forms the cache key, as in
+    ``_artist_history_json``.
+    """
+    payload = build(*args)
+    if _orjson is not None:
+        return _orjson.dumps(payload)
+    return JSONResponse(payload).body
+
+
+def _versioned_json_response(
+    build: Callable[..., object], *args: object, ttl: int | None = None
+) -> Response:
+    """Serve ``build(*args)`` as JSON, reusing the body until scrobbles change.
+
+    Parameters
+    ----------
+    build : Callable[..., object]
+        Function computing the response payload from the database.
+    *args : object
+        Hashable arguments passed on to ``build``.
+    ttl : int | None
+        Also expire the body after this many seconds, for payloads whose
+        windows are relative to the current time.
+
+    Returns
+    -------
+    Response
+        Pre-encoded JSON response.
+    """
+    with get_db_connection() as conn:
+        data_version = _data_version(conn)
+    if data_version is None:
+        return JSONResponse(build(*args))
+    time_bucket = int(_time.time()) // ttl if ttl else 0
+    body = _versioned_json(build, str(DB_NAME), data_version, time_bucket, *args)
+    return Response(body, media_type="application/json")
+
+
+# Dark theme for the per-artist monthly history chart; the x range is filled
+# in per artist
+_MONTHLY_HISTORY_LAYOUT = {
+    "paper_bgcolor": "#161b22",
+    "plot_bgcolor": "#161b22",
+    "font": {"color": "#f0f6fc"},
+    "legend": {"bgcolor": "#0d1117", "bordercolor": "#30363d", "borderwidth": 1},
+    "bargap": 0.1,
+    "hovermode": "x unified",
+    "margin": {"t": 10},
+    "xaxis": {
+        "gridcolor": "#30363d",
+        "color": "#f0f6fc",
+        "rangeslider": {
+            "visible": True,
+            "bgcolor": "#0d1117",
+            "bordercolor": "#30363d",
+            "borderwidth": 1,
+            "thickness": 0.3,
+        },
+        "rangeselector": {
+            "buttons": [
+                {"count": 1, "label": "1y", "step": "year", "stepmode": "backward"},
+                {"count": 3, "label": "3y", "step": "year", "stepmode": "backward"},
+                {"count": 5, "label": "5y", "step": "year", "stepmode": "backward"},
+                {"step": "all", "label": "All"},
+            ],
+            "bgcolor": "#161b22",
+            "activecolor": "#238636",
+            "bordercolor": "#30363d",
+            "borderwidth": 1,
+            "font": {"color": "#f0f6fc"},
+        },
+    },
+    "yaxis": {"gridcolor": "#30363d", "color": "#f0f6fc", "title": {"text": "Plays"}},
+}
+
+
 class CurrentStats:
     """Show stats about a given artist."""
 
     def listening_history_db(self, artist: str):
         """Get monthly play counts as a bar + rolling-avg chart."""
-        with sqlite3.connect(DB_NAME) as conn:
+        with get_db_connection() as conn:
             rows = conn.execute(
                 """SELECT strftime('%Y-%m', timestamp, 'unixepoch') as month,
                           COUNT(*) as plays
@@ -1057,161 +1742,154 @@ class CurrentStats:
             ).fetchall()
 
         if not rows:
-            return go.Figure().to_dict()
-
-        df = pd.DataFrame(rows, columns=["month", "plays"])
-        df["month_dt"] = pd.to_datetime(df["month"])
-        df["rolling3"] = df["plays"].rolling(3, center=True, min_periods=1).mean()
-        months = df["month_dt"].dt.strftime("%Y-%m-%dT%H:%M:%S").tolist()
-
-        max_dt = df["month_dt"].max()
-        initial_start = max_dt - pd.DateOffset(years=3)
-
-        fig = go.Figure()
-        fig.add_trace(go.Bar(
-            x=months, y=df["plays"].tolist(),
-            name="Monthly plays",
-            marker_color="#1f6feb", marker_opacity=0.6,
-            hovertemplate="%{y} plays<extra></extra>",
-        ))
-        fig.add_trace(go.Scatter(
-            x=months, y=df["rolling3"].round(1).tolist(),
-            name="3-month avg", mode="lines",
-            line=dict(color="#f78166", width=2),
-            hovertemplate="%{y:.1f} avg<extra></extra>",
-        ))
-        fig.update_layout(
-            paper_bgcolor="#161b22", plot_bgcolor="#161b22",
-            font=dict(color="#f0f6fc"),
-            legend=dict(bgcolor="#0d1117", bordercolor="#30363d", borderwidth=1),
-            bargap=0.1, hovermode="x unified",
-            margin=dict(t=10),
-            xaxis=dict(
-                gridcolor="#30363d", color="#f0f6fc",
-                range=[initial_start.strftime("%Y-%m-%d"), max_dt.strftime("%Y-%m-%d")],
-                rangeslider=dict(visible=True, bgcolor="#0d1117",
-                                 bordercolor="#30363d", borderwidth=1, thickness=0.3),
-                rangeselector=dict(
-                    buttons=[
-                        dict(count=1, label="1y", step="year", stepmode="backward"),
-                        dict(count=3, label="3y", step="year", stepmode="backward"),
-                        dict(count=5, label="5y", step="year", stepmode="backward"),
-                        dict(step="all", label="All"),
-                    ],
-                    bgcolor="#161b22", activecolor="#238636",
-                    bordercolor="#30363d", borderwidth=1,
-                    font=dict(color="#f0f6fc"),
-                ),
-            ),
-            yaxis=dict(gridcolor="#30363d", color="#f0f6fc", title="Plays"),
-        )
-        return fig.to_dict()
+            return _empty_figure()
+
+        months = [f"{month}-01T00:00:00" for month, _ in rows]
+        plays = [count for _, count in rows]
+        rolling3 = [round(mean, 1) for mean in _rolling_mean(plays, 3)]
+
+        # Months come back sorted as YYYY-MM, so the last one is the latest
+        last_year, last_month = rows[-1][0].split("-")
+        initial_range = [f"{int(last_year) - 3}-{last_month}-01", f"{rows[-1][0]}-01"]
+
+        return {
+            "data": [
+                {
+                    "type": "bar",
+                    "x": months,
+                    "y": plays,
+                    "name": "Monthly plays",
+                    "marker": {"color": "#1f6feb", "opacity": 0.6},
+                    "hovertemplate": "%{y} plays<extra></extra>",
+                },
+                {
+                    "type": "scatter",
+                    "x": months,
+                    "y": rolling3,
+                    "name": "3-month avg",
+                    "mode": "lines",
+                    "line": {"color": "#f78166", "width": 2},
+                    "hovertemplate": "%{y:.1f} avg<extra></extra>",
+                },
+            ],
+            "layout": {
+                **_MONTHLY_HISTORY_LAYOUT,
+                "xaxis": {**_MONTHLY_HISTORY_LAYOUT["xaxis"], "range": initial_range},
+            },
+        }
 
     def top_songs(self, artist: str):
         """Get the top songs of an artist as a bar plot."""
-        with sqlite3.connect(DB_NAME) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT track FROM musiclibrary WHERE artist = ?", (artist,))
-            tracks = [row[0] for row in cursor.fetchall()]
+        with get_db_connection() as conn:
+            # Ascending, so the most played song ends up at the top of the bars;
+            # ties put the first-stored song higher, as Counter.most_common did
+            rows = conn.execute(
+                """SELECT track, COUNT(*) AS plays
+                   FROM musiclibrary WHERE artist = ?
+                   GROUP BY track ORDER BY plays ASC, MIN(id) DESC""",
+                (artist,),
+            ).fetchall()
 
-        songs = OrderedDict(Counter(tracks).most_common())
-        unique_songs = list(songs.keys())[::-1]
-        song_counts = list(songs.values())[::-1]
+        unique_songs = [track for track, _ in rows]
+        song_counts = [plays for _, plays in rows]
         length = max(len(unique_songs) * 30, 100)
 
-        fig = px.bar(
-            x=song_counts,
-            y=unique_songs,
-            orientation="h",
-            title="Top songs",
-            height=length,
-        )
-        fig.update_layout(
-            title_x=0.5,
-            xaxis_title="Count",
-            yaxis_title="Track",
-            showlegend=True,
-            title_font_family="Open Sans",
-            title_font_size=25,
-            paper_bgcolor="#161b22",
-            plot_bgcolor="#161b22",
-            font=dict(color="#f0f6fc"),
-            xaxis=dict(gridcolor="#30363d", color="#f0f6fc"),
-            yaxis=dict(gridcolor="#30363d", color="#f0f6fc"),
-        )
-
-        # Convert to plain dict without binary encoding
-        fig_dict = fig.to_dict()
-        fig_dict["data"][0]["x"] = song_counts
-        fig_dict["data"][0]["y"] = unique_songs
-        return fig_dict
+        return {
+            "data": [
+                {
+                    "type": "bar",
+                    "orientation": "h",
+                    "x": song_counts,
+                    "y": unique_songs,
+                    "marker": {"color": "#636efa"},
+                    "hovertemplate": "x=%{x}<br>y=%{y}<extra></extra>",
+                    "showlegend": False,
+                }
+            ],
+            "layout": {
+                "title": {
+                    "text": "Top songs",
+                    "x": 0.5,
+                    "font": {"family": "Open Sans", "size": 25},
+                },
+                "height": length,
+                "xaxis": {
+                    "title": {"text": "Count"},
+                    "gridcolor": "#30363d",
+                    "color": "#f0f6fc",
+                },
+                "yaxis": {
+                    "title": {"text": "Track"},
+                    "gridcolor": "#30363d",
+                    "color": "#f0f6fc",
+                },
+                "showlegend": True,
+                "font": {"color": "#f0f6fc"},
+                "paper_bgcolor": "#161b22",
+                "plot_bgcolor": "#161b22",
+            },
+        }
 
 
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
-    """Display main dashboard page."""
+    """Display main dashboard page.
+
+    The now-playing card is loaded separately via HTMX so the page does not
+    wait on the Last.fm round-trips.
+    """
+    return templates.TemplateResponse(request, "index.html", {})
+
+
+@app.get("/html/now-playing", response_class=HTMLResponse)
+def now_playing_html(request: Request):
+    """Get the currently playing track as an HTML fragment for HTMX."""
     current_track = None
     try:
-        user = network.get_user(USER_NAME)
+        user = _lastfm_user(get_network())
         now_playing = user.get_now_playing()
         if now_playing:
+            album = now_playing.get_album()  # One track.getInfo round-trip
             current_track = {
                 "artist": str(now_playing.artist),
                 "title": str(now_playing.title),
-                "album": str(now_playing.get_album())
-                if now_playing.get_album()
-                else "Unknown",
+                "album": str(album) if album else "Unknown",
             }
     except Exception:
         pass
     return templates.TemplateResponse(
-        request, "index.html", {"current_track": current_track}
+        request, "_now_playing.html", {"current_track": current_track}
     )
 
 
 @app.get("/artist/{artist_name:path}", response_class=HTMLResponse)
-async def artist_stats(
+def artist_stats(
     request: Request, artist_name: str, background_tasks: BackgroundTasks
 ):
     """Artist statistics page."""
-    stats = CurrentStats()
-
     artist_key = normalize_name(artist_name, "artist")
-    with sqlite3.connect(DB_NAME) as conn:
-        _canonical = conn.execute(
-            "SELECT artist FROM musiclibrary WHERE artist_key = ? "
-            "GROUP BY artist ORDER BY COUNT(*) DESC LIMIT 1",
-            (artist_key,),
-        ).fetchone()
+    with get_db_connection() as conn:
+        _canonical = conn.execute(CANONICAL_ARTIST_SQL, (artist_key,)).fetchone()
+        data_version = _data_version(conn)
     artist_name = _canonical[0] if _canonical else artist_name
 
-    # Get listening history (already returns plain dict)
-    history_json = json.dumps(stats.listening_history_db(artist_name))
+    # Get listening history; the chart only changes when scrobbles do
+    if data_version is None:
+        history_json = _dumps_json(CurrentStats().listening_history_db(artist_name))
+    else:
+        history_json = _artist_history_json(str(DB_NAME), artist_name, data_version)
 
     # Get basic artist stats and duration data
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
 
-        cursor.execute(
-            "SELECT COUNT(*) FROM musiclibrary WHERE artist_key = ?", (artist_key,)
-        )
-        total_plays = cursor.fetchone()[0]
-
-        cursor.execute(
-            "SELECT COUNT(DISTINCT track_key) FROM musiclibrary WHERE artist_key = ?",
+        # One pass over the artist's scrobbles for all the summary numbers
+        total_plays, unique_tracks, unique_albums, first_heard_ts = cursor.execute(
+            """SELECT COUNT(*), COUNT(DISTINCT track_key),
+                      COUNT(DISTINCT NULLIF(album_key, '')), MIN(timestamp)
+               FROM musiclibrary WHERE artist_key = ?""",
             (artist_key,),
-        )
-        unique_tracks = cursor.fetchone()[0]
-
-        cursor.execute(
-            "SELECT COUNT(DISTINCT album_key) FROM musiclibrary WHERE artist_key = ? AND album_key != ''",
-            (artist_key,),
-        )
-        unique_albums = cursor.fetchone()[0]
-
-        first_heard_ts = cursor.execute(
-            "SELECT MIN(timestamp) FROM musiclibrary WHERE artist_key = ?", (artist_key,)
-        ).fetchone()[0]
+        ).fetchone()
         first_heard = (
             datetime.datetime.fromtimestamp(first_heard_ts).strftime("%-d %B %Y")
             if first_heard_ts else None
@@ -1261,7 +1939,7 @@ async def artist_stats(
         background_tasks.add_task(fetch_and_cache_durations, missing)
 
     # Genre tags
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         genre_row = conn.execute(
             "SELECT tags, fetched_at FROM artist_genres WHERE artist = ?",
             (artist_name,),
@@ -1274,13 +1952,13 @@ async def artist_stats(
         genres = json.loads(genre_row[0])
         genres_fetched = True
         if not genres and _time.time() - genre_row[1] > GENRES_RETRY_DAYS * 86_400:
-            with sqlite3.connect(DB_NAME) as conn:
+            with get_db_connection() as conn:
                 conn.execute("DELETE FROM artist_genres WHERE artist = ?", (artist_name,))
             background_tasks.add_task(fetch_and_cache_artist_genres, artist_name)
             genres_fetched = False
 
     # Artist metadata (bio + similar artists)
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         meta_row = conn.execute(
             "SELECT bio, similar_artists, fetched_at FROM artist_metadata WHERE artist = ?",
             (artist_name,),
@@ -1295,7 +1973,7 @@ async def artist_stats(
         artist_similar = json.loads(meta_row[1]) if meta_row[1] else []
         artist_metadata_fetched = True
         if not artist_bio and not artist_similar and _time.time() - meta_row[2] > METADATA_RETRY_DAYS * 86_400:
-            with sqlite3.connect(DB_NAME) as conn:
+            with get_db_connection() as conn:
                 conn.execute("DELETE FROM artist_metadata WHERE artist = ?", (artist_name,))
             background_tasks.add_task(fetch_and_cache_artist_metadata, artist_name)
             artist_metadata_fetched = False
@@ -1323,9 +2001,13 @@ async def artist_stats(
 
 
 @app.get("/top-artists")
-async def top_artists():
+def top_artists() -> Response:
     """Get top artists data (JSON for backwards compatibility)."""
-    with sqlite3.connect(DB_NAME) as conn:
+    return _versioned_json_response(_top_artists)
+
+
+def _top_artists() -> dict:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT
@@ -1338,16 +2020,14 @@ async def top_artists():
             ORDER BY plays DESC
             LIMIT 50
         """)
-        result = cursor.fetchall()
-
-    artists = [{"artist": row[0], "plays": row[1]} for row in result]
+        artists = [{"artist": artist, "plays": plays} for artist, plays in cursor]
     return {"artists": artists}
 
 
 @app.get("/html/top-artists", response_class=HTMLResponse)
-async def top_artists_html(request: Request):
+def top_artists_html(request: Request):
     """Get top artists as HTML fragment for HTMX."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT
@@ -1360,18 +2040,16 @@ async def top_artists_html(request: Request):
             ORDER BY plays DESC
             LIMIT 50
         """)
-        result = cursor.fetchall()
-
-    artists = [{"artist": row[0], "plays": row[1]} for row in result]
+        artists = [{"artist": artist, "plays": plays} for artist, plays in cursor]
     return templates.TemplateResponse(
         request, "_top_artists_list.html", {"artists": artists}
     )
 
 
 @app.get("/html/top-albums", response_class=HTMLResponse)
-async def top_albums_html(request: Request):
+def top_albums_html(request: Request):
     """Get top albums as HTML fragment for HTMX."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT
@@ -1388,18 +2066,19 @@ async def top_albums_html(request: Request):
             ORDER BY plays DESC
             LIMIT 50
         """)
-        result = cursor.fetchall()
-
-    albums = [{"artist": row[0], "album": row[1], "plays": row[2]} for row in result]
+        albums = [
+            {"artist": artist, "album": album, "plays": plays}
+            for artist, album, plays in cursor
+        ]
     return templates.TemplateResponse(
         request, "_top_albums_list.html", {"albums": albums}
     )
 
 
 @app.get("/html/top-songs", response_class=HTMLResponse)
-async def top_songs_html(request: Request):
+def top_songs_html(request: Request):
     """Get top songs as HTML fragment for HTMX."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT
@@ -1415,18 +2094,19 @@ async def top_songs_html(request: Request):
             ORDER BY plays DESC
             LIMIT 50
         """)
-        result = cursor.fetchall()
-
-    songs = [{"artist": row[0], "track": row[1], "plays": row[2]} for row in result]
+        songs = [
+            {"artist": artist, "track": track, "plays": plays}
+            for artist, track, plays in cursor
+        ]
     return templates.TemplateResponse(
         request, "_top_songs_list.html", {"songs": songs}
     )
 
 
 @app.get("/charts/listening-timeline")
-async def listening_timeline(
+def listening_timeline(
     time_range: str = Query("year", alias="range", pattern="^(year|all)$"),
-) -> dict:
+) -> Response:
     """Generate listening timeline chart.
 
     Parameters
@@ -1437,10 +2117,15 @@ async def listening_timeline(
 
     Returns
     -------
-    dict
-        Plotly figure as a dictionary with ``data`` and ``layout`` keys.
+    Response
+        Plotly figure as JSON with ``data`` and ``layout`` keys.
     """
-    with sqlite3.connect(DB_NAME) as conn:
+    # The "year" window slides with the clock, but only by whole days
+    return _versioned_json_response(_listening_timeline, time_range, ttl=3600)
+
+
+def _listening_timeline(time_range: str) -> dict:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
 
         if time_range == "all":
@@ -1460,18 +2145,17 @@ async def listening_timeline(
             """)
         result = cursor.fetchall()
 
-    df = pd.DataFrame(result, columns=["date", "plays"])
-    df["date"] = pd.to_datetime(df["date"])
-    df["rolling7"] = df["plays"].rolling(7, center=True, min_periods=1).mean()
-
-    dates = df["date"].dt.strftime("%Y-%m-%dT%H:%M:%S").tolist()
+    # DATE() already yields ISO strings Plotly can plot as-is
+    dates = [row[0] for row in result]
+    plays = [row[1] for row in result]
+    rolling7 = _rolling_mean(plays, 7)
 
     fig = go.Figure()
 
     fig.add_trace(
         go.Bar(
             x=dates,
-            y=df["plays"].tolist(),
+            y=plays,
             name="Daily plays",
             marker_color="#1f6feb",
             marker_opacity=0.6,
@@ -1482,7 +2166,7 @@ async def listening_timeline(
     fig.add_trace(
         go.Scatter(
             x=dates,
-            y=df["rolling7"].round(1).tolist(),
+            y=[round(avg, 1) for avg in rolling7],
             name="7-day avg",
             mode="lines",
             line=dict(color="#f78166", width=2),
@@ -1490,10 +2174,10 @@ async def listening_timeline(
         )
     )
 
-    if len(df) > 0:
-        peak_idx = int(df["plays"].idxmax())
+    if plays:
+        peak_idx = max(range(len(plays)), key=plays.__getitem__)
         peak_date = dates[peak_idx]
-        peak_val = int(df["plays"].iloc[peak_idx])
+        peak_val = plays[peak_idx]
         fig.add_annotation(
             x=peak_date,
             y=peak_val,
@@ -1512,12 +2196,13 @@ async def listening_timeline(
         )
 
     # Calculate initial view range (last 30 days)
-    if len(df) > 0:
-        max_date = df["date"].max()
-        min_date = df["date"].min()
-        initial_end = max_date
-        initial_start = max_date - pd.Timedelta(days=90)
-        initial_start = max(initial_start, min_date)
+    if dates:
+        # Rows are ordered by date, and ISO dates compare correctly as strings
+        initial_end = dates[-1]
+        initial_start = (
+            datetime.date.fromisoformat(initial_end) - datetime.timedelta(days=90)
+        ).isoformat()
+        initial_start = max(initial_start, dates[0])
     else:
         initial_start = initial_end = None
 
@@ -1569,146 +2254,117 @@ async def listening_timeline(
     return fig.to_dict()
 
 
-@app.get("/recent-stats")
-async def recent_stats():
-    """Get top artists, albums, and songs from past week and month (JSON)."""
-    with sqlite3.connect(DB_NAME) as conn:
-        cursor = conn.cursor()
+# Entries per list in the recent-stats week and month rankings. The ranking in
+# _recent_top_sql works on the keys alone, so display names are only looked
+# up for rows that make one of the lists.
+RECENT_TOP_LIMIT = 5
 
-        # Top 5 artists from past week
-        cursor.execute("""
-            SELECT
-                (SELECT m2.artist FROM musiclibrary m2
-                 WHERE m2.artist_key = m.artist_key
-                 GROUP BY m2.artist ORDER BY COUNT(*) DESC LIMIT 1) AS artist,
-                COUNT(*) AS plays
-            FROM musiclibrary m
-            WHERE m.timestamp >= strftime('%s', 'now', '-7 days')
-            GROUP BY m.artist_key
-            ORDER BY plays DESC
-            LIMIT 5
-        """)
-        week_artists = [
-            {"artist": row[0], "plays": row[1]} for row in cursor.fetchall()
-        ]
 
-        # Top 5 albums from past week
-        cursor.execute("""
-            SELECT
-                (SELECT m2.artist FROM musiclibrary m2
-                 WHERE m2.artist_key = m.artist_key
-                 GROUP BY m2.artist ORDER BY COUNT(*) DESC LIMIT 1) AS artist,
-                (SELECT m2.album FROM musiclibrary m2
-                 WHERE m2.artist_key = m.artist_key AND m2.album_key = m.album_key
-                 GROUP BY m2.album ORDER BY COUNT(*) DESC LIMIT 1) AS album,
-                COUNT(*) AS plays
-            FROM musiclibrary m
-            WHERE m.timestamp >= strftime('%s', 'now', '-7 days')
-                AND m.album_key != ''
-            GROUP BY m.artist_key, m.album_key
-            ORDER BY plays DESC
-            LIMIT 5
-        """)
-        week_albums = [
-            {"artist": row[0], "album": row[1], "plays": row[2]}
-            for row in cursor.fetchall()
-        ]
+def _recent_top_sql(item: str | None) -> str:
+    """Build the week and month top-N query for artists, albums or tracks.
 
-        # Top 5 songs from past week
-        cursor.execute("""
-            SELECT
-                (SELECT m2.artist FROM musiclibrary m2
-                 WHERE m2.artist_key = m.artist_key
-                 GROUP BY m2.artist ORDER BY COUNT(*) DESC LIMIT 1) AS artist,
-                (SELECT m2.track FROM musiclibrary m2
-                 WHERE m2.artist_key = m.artist_key AND m2.track_key = m.track_key
-                 GROUP BY m2.track ORDER BY COUNT(*) DESC LIMIT 1) AS track,
-                COUNT(*) AS plays
-            FROM musiclibrary m
-            WHERE m.timestamp >= strftime('%s', 'now', '-7 days')
-            GROUP BY m.artist_key, m.track_key
-            ORDER BY plays DESC
-            LIMIT 5
-        """)
-        week_songs = [
-            {"artist": row[0], "track": row[1], "plays": row[2]}
-            for row in cursor.fetchall()
-        ]
+    Both windows come from one pass over the 30-day slice: the week count is
+    a conditional sum over the same rows, and each window gets its own
+    ``ROW_NUMBER`` so display names are only looked up for the few rows that
+    make either list. Equal play counts rank the most recently played first;
+    timestamps are unique, so the order is stable between requests.
 
-        # Top 5 artists from past month
-        cursor.execute("""
-            SELECT
-                (SELECT m2.artist FROM musiclibrary m2
-                 WHERE m2.artist_key = m.artist_key
-                 GROUP BY m2.artist ORDER BY COUNT(*) DESC LIMIT 1) AS artist,
-                COUNT(*) AS plays
-            FROM musiclibrary m
-            WHERE m.timestamp >= strftime('%s', 'now', '-30 days')
-            GROUP BY m.artist_key
-            ORDER BY plays DESC
-            LIMIT 5
-        """)
-        month_artists = [
-            {"artist": row[0], "plays": row[1]} for row in cursor.fetchall()
-        ]
+    Parameters
+    ----------
+    item : str | None
+        ``"album"`` or ``"track"`` to rank per artist and item, or ``None``
+        to rank artists.
 
-        # Top 5 albums from past month
-        cursor.execute("""
-            SELECT
-                (SELECT m2.artist FROM musiclibrary m2
-                 WHERE m2.artist_key = m.artist_key
-                 GROUP BY m2.artist ORDER BY COUNT(*) DESC LIMIT 1) AS artist,
-                (SELECT m2.album FROM musiclibrary m2
-                 WHERE m2.artist_key = m.artist_key AND m2.album_key = m.album_key
-                 GROUP BY m2.album ORDER BY COUNT(*) DESC LIMIT 1) AS album,
-                COUNT(*) AS plays
-            FROM musiclibrary m
-            WHERE m.timestamp >= strftime('%s', 'now', '-30 days')
-                AND m.album_key != ''
-            GROUP BY m.artist_key, m.album_key
-            ORDER BY plays DESC
-            LIMIT 5
-        """)
-        month_albums = [
-            {"artist": row[0], "album": row[1], "plays": row[2]}
-            for row in cursor.fetchall()
-        ]
+    Returns
+    -------
+    str
+        Query taking ``:week`` and ``:month`` cutoffs and returning
+        ``(period, artist, [item,] plays)`` rows, best first per period.
+    """
+    keys = "artist_key" + (f", {item}_key" if item else "")
+    where = " AND album_key != ''" if item == "album" else ""
+    names = """
+            (SELECT m2.artist FROM musiclibrary m2
+             WHERE m2.artist_key = top.artist_key
+             GROUP BY m2.artist ORDER BY COUNT(*) DESC LIMIT 1) AS artist"""
+    if item:
+        names += f""",
+            (SELECT m2.{item} FROM musiclibrary m2
+             WHERE m2.artist_key = top.artist_key AND m2.{item}_key = top.{item}_key
+             GROUP BY m2.{item} ORDER BY COUNT(*) DESC LIMIT 1) AS {item}"""
+    columns = "artist" + (f", {item}" if item else "")
+    return f"""
+        WITH counts AS (
+            SELECT {keys},
+                   SUM(timestamp >= :week) AS week_plays,
+                   COUNT(*) AS month_plays,
+                   MAX(timestamp) AS last_played
+            FROM musiclibrary
+            WHERE timestamp >= :month{where}
+            GROUP BY {keys}
+        ),
+        ranked AS (
+            SELECT *,
+                   ROW_NUMBER() OVER (
+                       ORDER BY week_plays DESC, last_played DESC
+                   ) AS week_rank,
+                   ROW_NUMBER() OVER (
+                       ORDER BY month_plays DESC, last_played DESC
+                   ) AS month_rank
+            FROM counts
+        ),
+        top AS MATERIALIZED (
+            SELECT * FROM ranked
+            WHERE (week_rank <= {RECENT_TOP_LIMIT} AND week_plays > 0)
+               OR month_rank <= {RECENT_TOP_LIMIT}
+        ),
+        named AS MATERIALIZED (
+            SELECT {names},
+                week_plays, month_plays, week_rank, month_rank
+            FROM top
+        )
+        SELECT 'week' AS period, {columns}, week_plays AS plays, week_rank AS rank
+        FROM named WHERE week_rank <= {RECENT_TOP_LIMIT} AND week_plays > 0
+        UNION ALL
+        SELECT 'month', {columns}, month_plays, month_rank
+        FROM named WHERE month_rank <= {RECENT_TOP_LIMIT}
+        ORDER BY period, rank
+    """  # noqa: S608
 
-        # Top 5 songs from past month
-        cursor.execute("""
-            SELECT
-                (SELECT m2.artist FROM musiclibrary m2
-                 WHERE m2.artist_key = m.artist_key
-                 GROUP BY m2.artist ORDER BY COUNT(*) DESC LIMIT 1) AS artist,
-                (SELECT m2.track FROM musiclibrary m2
-                 WHERE m2.artist_key = m.artist_key AND m2.track_key = m.track_key
-                 GROUP BY m2.track ORDER BY COUNT(*) DESC LIMIT 1) AS track,
-                COUNT(*) AS plays
-            FROM musiclibrary m
-            WHERE m.timestamp >= strftime('%s', 'now', '-30 days')
-            GROUP BY m.artist_key, m.track_key
-            ORDER BY plays DESC
-            LIMIT 5
-        """)
-        month_songs = [
-            {"artist": row[0], "track": row[1], "plays": row[2]}
-            for row in cursor.fetchall()
-        ]
 
-    return {
-        "week_artists": week_artists,
-        "week_albums": week_albums,
-        "week_songs": week_songs,
-        "month_artists": month_artists,
-        "month_albums": month_albums,
-        "month_songs": month_songs,
+_RECENT_TOP_QUERIES = {
+    "artists": (("artist",), _recent_top_sql(None)),
+    "albums": (("artist", "album"), _recent_top_sql("album")),
+    "songs": (("artist", "track"), _recent_top_sql("track")),
+}
+
+
+@app.get("/recent-stats")
+def recent_stats() -> Response:
+    """Get top artists, albums, and songs from past week and month (JSON)."""
+    return _versioned_json_response(_recent_stats, ttl=300)
+
+
+def _recent_stats() -> dict:
+    now = int(_time.time())
+    cutoffs = {"week": now - 7 * 86400, "month": now - 30 * 86400}
+    stats = {
+        f"{period}_{kind}": [] for period in cutoffs for kind in _RECENT_TOP_QUERIES
     }
+    with get_db_connection() as conn:
+        for kind, (fields, query) in _RECENT_TOP_QUERIES.items():
+            for period, *names, plays, _rank in conn.execute(query, cutoffs):
+                stats[f"{period}_{kind}"].append(
+                    {**dict(zip(fields, names, strict=True)), "plays": plays}
+                )
+
+    return stats
 
 
 @app.get("/html/on-this-day", response_class=HTMLResponse)
-async def on_this_day():
+def on_this_day():
     """Artists listened to on today's date in previous years."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         rows = conn.execute(
             """SELECT strftime('%Y', m.timestamp, 'unixepoch') as year,
                     (SELECT m2.artist FROM musiclibrary m2
@@ -1794,9 +2450,9 @@ def _streak_history(conn: sqlite3.Connection) -> list[_StreakEntry]:
 
 
 @app.get("/html/streak-history", response_class=HTMLResponse)
-async def streak_history_html():
+def streak_history_html():
     """Top 10 longest listening streaks as an HTML visual."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         streaks = _streak_history(conn)
 
     if not streaks:
@@ -1827,9 +2483,9 @@ async def streak_history_html():
 
 
 @app.get("/html/lost-artists", response_class=HTMLResponse)
-async def lost_artists_html():
+def lost_artists_html():
     """Artists with 20+ plays not heard in the last 2 years."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         rows = conn.execute(
             """SELECT
                     (SELECT m2.artist FROM musiclibrary m2
@@ -1866,9 +2522,9 @@ async def lost_artists_html():
 
 
 @app.get("/html/calendar-heatmap", response_class=HTMLResponse)
-async def calendar_heatmap_html():
+def calendar_heatmap_html():
     """GitHub-style activity calendar as a responsive SVG."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT DATE(timestamp, 'unixepoch') as date, COUNT(*) as plays
@@ -1877,9 +2533,7 @@ async def calendar_heatmap_html():
             GROUP BY date
             ORDER BY date ASC
         """)
-        result = cursor.fetchall()
-
-    plays_by_date: dict[str, int] = {row[0]: row[1] for row in result}
+        plays_by_date: dict[str, int] = dict(cursor)
 
     today = datetime.date.today()
     # Align to Monday-first weeks
@@ -1965,19 +2619,19 @@ async def calendar_heatmap_html():
 
 
 @app.get("/html/recent-favorites", response_class=HTMLResponse)
-async def recent_favorites_html(request: Request):
+def recent_favorites_html(request: Request):
     """Get recent favorites as HTML fragment for HTMX."""
     # Reuse the same query logic
-    stats = await recent_stats()
+    stats = _recent_stats()
     return templates.TemplateResponse(
         request, "_recent_favorites.html", {**stats}
     )
 
 
 @app.get("/html/recent-plays", response_class=HTMLResponse)
-async def recent_plays_html(request: Request):
+def recent_plays_html(request: Request):
     """Get last 30 scrobbles as an HTML fragment for HTMX."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT artist, track, timestamp
@@ -2000,9 +2654,9 @@ async def recent_plays_html(request: Request):
 
 
 @app.get("/artist-top-songs")
-async def artist_top_songs(artist: str):
+def artist_top_songs(artist: str):
     """Get top songs for a specific artist."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -2019,16 +2673,14 @@ async def artist_top_songs(artist: str):
         """,
             (normalize_name(artist, "artist"),),
         )
-        result = cursor.fetchall()
-
-    songs = [{"track": row[0], "plays": row[1]} for row in result]
+        songs = [{"track": track, "plays": plays} for track, plays in cursor]
     return {"songs": songs}
 
 
 @app.get("/artist-top-albums")
-async def artist_top_albums(artist: str):
+def artist_top_albums(artist: str):
     """Get top albums for a specific artist."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -2045,14 +2697,12 @@ async def artist_top_albums(artist: str):
         """,
             (normalize_name(artist, "artist"),),
         )
-        result = cursor.fetchall()
-
-    albums = [{"album": row[0], "plays": row[1]} for row in result]
+        albums = [{"album": album, "plays": plays} for album, plays in cursor]
     return {"albums": albums}
 
 
 @app.get("/album/{artist_name}/{album_name:path}", response_class=HTMLResponse)
-async def album_stats(
+def album_stats(
     request: Request,
     artist_name: str,
     album_name: str,
@@ -2061,11 +2711,9 @@ async def album_stats(
     """Album statistics page."""
     artist_key = normalize_name(artist_name, "artist")
     album_key = normalize_name(album_name, "album")
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         _canonical_artist = conn.execute(
-            "SELECT artist FROM musiclibrary WHERE artist_key = ? "
-            "GROUP BY artist ORDER BY COUNT(*) DESC LIMIT 1",
-            (artist_key,),
+            CANONICAL_ARTIST_SQL, (artist_key,)
         ).fetchone()
         _canonical_album = conn.execute(
             "SELECT album FROM musiclibrary WHERE artist_key = ? AND album_key = ? "
@@ -2074,21 +2722,15 @@ async def album_stats(
         ).fetchone()
     artist_name = _canonical_artist[0] if _canonical_artist else artist_name
     album_name = _canonical_album[0] if _canonical_album else album_name
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
 
         # Get album stats
-        cursor.execute(
-            "SELECT COUNT(*) FROM musiclibrary WHERE artist_key = ? AND album_key = ?",
-            (artist_key, album_key),
-        )
-        total_plays = cursor.fetchone()[0]
-
-        cursor.execute(
-            "SELECT COUNT(DISTINCT track_key) FROM musiclibrary WHERE artist_key = ? AND album_key = ?",
+        total_plays, unique_tracks, first_heard_ts = cursor.execute(
+            """SELECT COUNT(*), COUNT(DISTINCT track_key), MIN(timestamp)
+               FROM musiclibrary WHERE artist_key = ? AND album_key = ?""",
             (artist_key, album_key),
-        )
-        unique_tracks = cursor.fetchone()[0]
+        ).fetchone()
 
         # Get per-track play counts and durations for this album
         cursor.execute(
@@ -2108,10 +2750,6 @@ async def album_stats(
             conn, tracks_plays
         )
 
-        first_heard_ts = cursor.execute(
-            "SELECT MIN(timestamp) FROM musiclibrary WHERE artist_key = ? AND album_key = ?",
-            (artist_key, album_key),
-        ).fetchone()[0]
         first_heard = (
             datetime.datetime.fromtimestamp(first_heard_ts).strftime("%-d %B %Y")
             if first_heard_ts else None
@@ -2148,40 +2786,26 @@ async def album_stats(
             if row[0] not in cached_tracks or row[0] in stale_tracks
         ]
 
-        # Get listening history
+        # Get listening history, one cumulative point per day rather than
+        # per scrobble so the chart payload stays small for heavy rotation;
+        # the running total is summed by SQLite
         cursor.execute(
             """
-            SELECT timestamp FROM musiclibrary
+            SELECT date(timestamp, 'unixepoch', 'localtime') AS day,
+                   SUM(COUNT(*)) OVER (ORDER BY date(timestamp, 'unixepoch', 'localtime'))
+            FROM musiclibrary
             WHERE artist_key = ? AND album_key = ?
-            ORDER BY timestamp
+            GROUP BY day
+            ORDER BY day
         """,
             (artist_key, album_key),
         )
-        timestamps = [row[0] for row in cursor.fetchall()]
+        daily = cursor.fetchall()
 
-    dates = [datetime.datetime.fromtimestamp(int(ts)) for ts in timestamps]
-    counts = list(range(1, len(dates) + 1))
-
-    df = pd.DataFrame({"date": dates, "count": counts})
-    fig = px.line(df, x="date", y="count", title="Listening history")
-    fig.update_layout(
-        title_x=0.5,
-        xaxis_title="Time",
-        yaxis_title="Count",
-        showlegend=True,
-        title_font_family="Open Sans",
-        title_font_size=25,
-        paper_bgcolor="#161b22",
-        plot_bgcolor="#161b22",
-        font=dict(color="#f0f6fc"),
-        xaxis=dict(gridcolor="#30363d", color="#f0f6fc"),
-        yaxis=dict(gridcolor="#30363d", color="#f0f6fc"),
-    )
+    dates = [row[0] for row in daily]
+    counts = [row[1] for row in daily]
 
-    fig_dict = fig.to_dict()
-    fig_dict["data"][0]["x"] = [d.strftime("%Y-%m-%dT%H:%M:%S") for d in dates]
-    fig_dict["data"][0]["y"] = counts
-    history_json = json.dumps(fig_dict)
+    history_json = _dumps_json(_cumulative_history_figure(dates, counts))
 
     if missing:
         background_tasks.add_task(fetch_and_cache_durations, missing)
@@ -2205,14 +2829,14 @@ async def album_stats(
 
 
 @app.get("/song/{artist_name}/{track_name:path}", response_class=HTMLResponse)
-async def song_stats(
+def song_stats(
     request: Request,
     artist_name: str,
     track_name: str,
     background_tasks: BackgroundTasks,
 ):
     """Song statistics page."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
 
         # Get song stats
@@ -2345,40 +2969,26 @@ async def song_stats(
             else None
         )
 
-        # Get listening history
+        # Get listening history, one cumulative point per day rather than
+        # per scrobble so the chart payload stays small for heavy rotation;
+        # the running total is summed by SQLite
         cursor.execute(
             """
-            SELECT timestamp FROM musiclibrary
+            SELECT date(timestamp, 'unixepoch', 'localtime') AS day,
+                   SUM(COUNT(*)) OVER (ORDER BY date(timestamp, 'unixepoch', 'localtime'))
+            FROM musiclibrary
             WHERE artist = ? AND track = ?
-            ORDER BY timestamp
+            GROUP BY day
+            ORDER BY day
         """,
             (artist_name, track_name),
         )
-        timestamps = [row[0] for row in cursor.fetchall()]
+        daily = cursor.fetchall()
 
-    dates = [datetime.datetime.fromtimestamp(int(ts)) for ts in timestamps]
-    counts = list(range(1, len(dates) + 1))
+    dates = [row[0] for row in daily]
+    counts = [row[1] for row in daily]
 
-    df = pd.DataFrame({"date": dates, "count": counts})
-    fig = px.line(df, x="date", y="count", title="Listening history")
-    fig.update_layout(
-        title_x=0.5,
-        xaxis_title="Time",
-        yaxis_title="Count",
-        showlegend=True,
-        title_font_family="Open Sans",
-        title_font_size=25,
-        paper_bgcolor="#161b22",
-        plot_bgcolor="#161b22",
-        font=dict(color="#f0f6fc"),
-        xaxis=dict(gridcolor="#30363d", color="#f0f6fc"),
-        yaxis=dict(gridcolor="#30363d", color="#f0f6fc"),
-    )
-
-    fig_dict = fig.to_dict()
-    fig_dict["data"][0]["x"] = [d.strftime("%Y-%m-%dT%H:%M:%S") for d in dates]
-    fig_dict["data"][0]["y"] = counts
-    history_json = json.dumps(fig_dict)
+    history_json = _dumps_json(_cumulative_history_figure(dates, counts))
 
     return templates.TemplateResponse(
         request,
@@ -2405,9 +3015,9 @@ async def song_stats(
 
 
 @app.get("/album-tracks")
-async def album_tracks(artist: str, album: str):
+def album_tracks(artist: str, album: str):
     """Get tracks from a specific album."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -2420,14 +3030,31 @@ async def album_tracks(artist: str, album: str):
         """,
             (artist, album),
         )
-        result = cursor.fetchall()
-
-    tracks = [{"track": row[0], "plays": row[1]} for row in result]
+        tracks = [{"track": track, "plays": plays} for track, plays in cursor]
     return {"tracks": tracks}
 
 
+@functools.lru_cache(maxsize=1)
+def _artist_search_index(
+    db_name: str, data_version: int | None
+) -> tuple[list[str], list[int], list[str]]:
+    """Return every artist with its play count and lowercased, accent-stripped name.
+
+    The library-wide ``GROUP BY`` and the per-name normalisation only change
+    when scrobbles do, so they are keyed on the data version (see
+    ``_artist_history_json``) instead of being redone on every keystroke.
+    """
+    with get_db_connection(db_name) as conn:
+        rows = conn.execute(
+            "SELECT artist, COUNT(*) FROM musiclibrary GROUP BY artist"
+        ).fetchall()
+    artists = [artist for artist, _ in rows]
+    plays = [count for _, count in rows]
+    return artists, plays, [normalize_text(artist.lower()) for artist in artists]
+
+
 @app.get("/api/search/artists")
-async def search_artists(q: str = "", limit: int = 10) -> dict:
+def search_artists(q: str = "", limit: int = 10) -> dict:
     """Search artists with fuzzy matching and Unicode normalization.
 
     Uses rapidfuzz for fuzzy matching and Unicode normalization for accent-insensitive search.
@@ -2449,62 +3076,38 @@ async def search_artists(q: str = "", limit: int = 10) -> dict:
     if not q or len(q) < min_query_length:
         return {"results": []}
 
-    with sqlite3.connect(DB_NAME) as conn:
-        cursor = conn.cursor()
-
-        # Get all artists with their play counts
-        cursor.execute("""
-            SELECT artist, COUNT(*) as plays
-            FROM musiclibrary
-            GROUP BY artist
-        """)
-        all_artists = {row[0]: row[1] for row in cursor.fetchall()}
+    with get_db_connection() as conn:
+        data_version = _data_version(conn)
+    build_index = (
+        _artist_search_index
+        if data_version is not None
+        else _artist_search_index.__wrapped__
+    )
+    artists, plays, artists_normalized = build_index(str(DB_NAME), data_version)
 
-    if not all_artists:
+    if not artists:
         return {"results": []}
 
     # Normalize query for accent-insensitive matching (ü -> u, é -> e, etc.)
-    q_lower = q.lower()
-    q_normalized = normalize_text(q_lower)
-
-    # Combine multiple matching strategies for best results
-    results_dict = {}
-
-    # Strategy 1: Exact substring match (case-insensitive + accent-insensitive)
-    for artist, plays in all_artists.items():
-        artist_lower = artist.lower()
-        artist_normalized = normalize_text(artist_lower)
-
-        # Check both regular and normalized versions for maximum compatibility
-        if q_lower in artist_lower or q_normalized in artist_normalized:
-            # Perfect substring match gets 100 similarity
-            results_dict[artist] = {
-                "artist": artist,
-                "plays": plays,
-                "similarity": 100.0,
-            }
-
-    # Strategy 2: Fuzzy matching for artists not already matched
-    remaining_artists = [a for a in all_artists.keys() if a not in results_dict]
-    if remaining_artists:
-        matches: list[tuple[str, float, int]] = process.extract(
-            q,
-            remaining_artists,
-            scorer=fuzz.WRatio,  # Weighted ratio for fuzzy matches
-            limit=limit * 2,
-            score_cutoff=60,  # Only decent matches
-        )
-
-        for match in matches:
-            artist = match[0]
-            results_dict[artist] = {
-                "artist": artist,
-                "plays": all_artists[artist],
-                "similarity": round(match[1], 1),
-            }
-
-    # Convert to list
-    results = list(results_dict.values())
+    q_normalized = normalize_text(q.lower())
+
+    # One pass over the normalized names: partial_ratio scores a substring
+    # match as 100 and ranks near misses below it
+    matches: list[tuple[str, float, int]] = process.extract(
+        q_normalized,
+        artists_normalized,
+        scorer=fuzz.partial_ratio,
+        limit=None,  # Keep every match so play count can break score ties
+        score_cutoff=60,  # Only decent matches
+    )
+    results = [
+        {
+            "artist": artists[index],
+            "plays": plays[index],
+            "similarity": round(score, 1),
+        }
+        for _, score, index in matches
+    ]
 
     # Sort by:
     # 1. Similarity score (higher is better)
@@ -2516,7 +3119,7 @@ async def search_artists(q: str = "", limit: int = 10) -> dict:
 
 
 @app.get("/api/search/all")
-async def search_all(q: str = "", limit: int = 5) -> dict:
+def search_all(q: str = "", limit: int = 5) -> dict:
     """Search artists, albums, and tracks with substring matching.
 
     Parameters
@@ -2538,7 +3141,7 @@ async def search_all(q: str = "", limit: int = 5) -> dict:
     q_lower = q.lower()
     q_norm = normalize_text(q_lower)
 
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         conn.create_function("NORM", 1, lambda s: normalize_text(s.lower()) if s else "")
 
         artist_rows = conn.execute(
@@ -2591,10 +3194,10 @@ async def search_all(q: str = "", limit: int = 5) -> dict:
 
 
 @app.get("/yearly", response_class=HTMLResponse)
-async def yearly_stats(request: Request):
+def yearly_stats(request: Request):
     """Yearly statistics page with year selector."""
     # Get available years from database
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT DISTINCT strftime('%Y', timestamp, 'unixepoch') as year
@@ -2614,9 +3217,9 @@ async def yearly_stats(request: Request):
 
 
 @app.get("/api/yearly/top-items")
-async def yearly_top_items(year: int, limit: int = 20):
+def yearly_top_items(year: int, limit: int = 20):
     """Get top songs, albums, and artists for a specific year."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
 
         # Top songs
@@ -2639,8 +3242,8 @@ async def yearly_top_items(year: int, limit: int = 20):
             (str(year), limit),
         )
         top_songs = [
-            {"artist": row[0], "track": row[1], "plays": row[2]}
-            for row in cursor.fetchall()
+            {"artist": artist, "track": track, "plays": plays}
+            for artist, track, plays in cursor
         ]
 
         # Top albums
@@ -2664,8 +3267,8 @@ async def yearly_top_items(year: int, limit: int = 20):
             (str(year), limit),
         )
         top_albums = [
-            {"artist": row[0], "album": row[1], "plays": row[2]}
-            for row in cursor.fetchall()
+            {"artist": artist, "album": album, "plays": plays}
+            for artist, album, plays in cursor
         ]
 
         # Top artists
@@ -2684,7 +3287,7 @@ async def yearly_top_items(year: int, limit: int = 20):
         """,
             (str(year), limit),
         )
-        top_artists = [{"artist": row[0], "plays": row[1]} for row in cursor.fetchall()]
+        top_artists = [{"artist": artist, "plays": plays} for artist, plays in cursor]
 
     return {
         "songs": top_songs,
@@ -2694,11 +3297,11 @@ async def yearly_top_items(year: int, limit: int = 20):
 
 
 @app.get("/html/yearly/top-items/{item_type}", response_class=HTMLResponse)
-async def yearly_top_items_html(
+def yearly_top_items_html(
     request: Request, item_type: str, year: int, limit: int = 20
 ):
     """Get top items as HTML fragment for HTMX (songs, albums, or artists)."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
 
         if item_type == "songs":
@@ -2721,8 +3324,8 @@ async def yearly_top_items_html(
                 (str(year), limit),
             )
             items = [
-                {"artist": row[0], "track": row[1], "plays": row[2]}
-                for row in cursor.fetchall()
+                {"artist": artist, "track": track, "plays": plays}
+                for artist, track, plays in cursor
             ]
         elif item_type == "albums":
             cursor.execute(
@@ -2745,8 +3348,8 @@ async def yearly_top_items_html(
                 (str(year), limit),
             )
             items = [
-                {"artist": row[0], "album": row[1], "plays": row[2]}
-                for row in cursor.fetchall()
+                {"artist": artist, "album": album, "plays": plays}
+                for artist, album, plays in cursor
             ]
         elif item_type == "artists":
             cursor.execute(
@@ -2764,7 +3367,7 @@ async def yearly_top_items_html(
             """,
                 (str(year), limit),
             )
-            items = [{"artist": row[0], "plays": row[1]} for row in cursor.fetchall()]
+            items = [{"artist": artist, "plays": plays} for artist, plays in cursor]
         else:
             return HTMLResponse(content="<p class='text-muted'>Invalid item type</p>")
 
@@ -2788,7 +3391,7 @@ async def compare_page(request: Request):
 
 
 @app.get("/api/compare/artists")
-async def compare_artists(artists: list[str] = Query(default=[])):  # noqa: B008
+def compare_artists(artists: list[str] = Query(default=[])):  # noqa: B008
     """Return comparison stats for up to 5 artists."""
     artists = artists[:5]
     if not artists:
@@ -2796,7 +3399,7 @@ async def compare_artists(artists: list[str] = Query(default=[])):  # noqa: B008
 
     placeholders = ",".join("?" * len(artists))
 
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
 
         # Basic stats
@@ -2891,7 +3494,7 @@ async def compare_artists(artists: list[str] = Query(default=[])):  # noqa: B008
 
 
 @app.get("/api/compare/artist-history")
-async def compare_artist_history(artists: list[str] = Query(default=[])):  # noqa: B008
+def compare_artist_history(artists: list[str] = Query(default=[])):  # noqa: B008
     """Return monthly play counts per artist for the comparison chart."""
     artists = artists[:5]
     if not artists:
@@ -2899,7 +3502,7 @@ async def compare_artist_history(artists: list[str] = Query(default=[])):  # noq
 
     placeholders = ",".join("?" * len(artists))
 
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             f"""
@@ -2924,9 +3527,9 @@ async def compare_artist_history(artists: list[str] = Query(default=[])):  # noq
 
 
 @app.get("/html/duration/top-songs", response_class=HTMLResponse)
-async def duration_top_songs(request: Request, limit: int = 20):
+def duration_top_songs(request: Request, limit: int = 20):
     """Top songs by total time spent listening."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -2958,9 +3561,9 @@ async def duration_top_songs(request: Request, limit: int = 20):
 
 
 @app.get("/html/duration/top-albums", response_class=HTMLResponse)
-async def duration_top_albums(request: Request, limit: int = 20):
+def duration_top_albums(request: Request, limit: int = 20):
     """Top albums by total time spent listening."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -2992,9 +3595,9 @@ async def duration_top_albums(request: Request, limit: int = 20):
 
 
 @app.get("/html/duration/top-artists", response_class=HTMLResponse)
-async def duration_top_artists(request: Request, limit: int = 20):
+def duration_top_artists(request: Request, limit: int = 20):
     """Top artists by total time spent listening."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -3025,9 +3628,9 @@ async def duration_top_artists(request: Request, limit: int = 20):
 
 
 @app.get("/html/duration/longest-songs", response_class=HTMLResponse)
-async def duration_longest_songs(request: Request, limit: int = 20, min_plays: int = 10):
+def duration_longest_songs(request: Request, limit: int = 20, min_plays: int = 10):
     """Longest songs (by track duration) with at least min_plays plays."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -3059,9 +3662,9 @@ async def duration_longest_songs(request: Request, limit: int = 20, min_plays: i
 
 
 @app.get("/html/duration/shortest-songs", response_class=HTMLResponse)
-async def duration_shortest_songs(request: Request, limit: int = 20, min_plays: int = 10):
+def duration_shortest_songs(request: Request, limit: int = 20, min_plays: int = 10):
     """Shortest songs (by track duration) with at least min_plays plays."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -3093,9 +3696,9 @@ async def duration_shortest_songs(request: Request, limit: int = 20, min_plays:
 
 
 @app.get("/charts/duration/avg-over-time")
-async def duration_avg_over_time_chart():
+def duration_avg_over_time_chart():
     """Average song length per month as a styled Plotly bar chart."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -3234,9 +3837,9 @@ async def duration_avg_over_time_chart():
 
 
 @app.get("/api/duration/histogram")
-async def duration_histogram():
+def duration_histogram():
     """Distribution of song durations (bucketed by minute) across played library."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -3280,11 +3883,11 @@ async def duration_histogram():
 
 
 @app.get("/html/duration/artists-by-length", response_class=HTMLResponse)
-async def duration_artists_by_length(
+def duration_artists_by_length(
     request: Request, limit: int = 20, min_plays: int = 50
 ):
     """Artists ranked by average track length, with at least min_plays total plays."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -3315,9 +3918,9 @@ async def duration_artists_by_length(
 
 
 @app.get("/api/yearly/time-patterns-duration")
-async def yearly_time_patterns_duration(year: int):
+def yearly_time_patterns_duration(year: int):
     """Get listening time in minutes by hour and day of week for a specific year."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
 
         cursor.execute(
@@ -3359,9 +3962,9 @@ async def yearly_time_patterns_duration(year: int):
 
 
 @app.get("/api/yearly/time-patterns")
-async def yearly_time_patterns(year: int):
+def yearly_time_patterns(year: int):
     """Get listening patterns by hour and day of week for a specific year."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
 
         # Hour of day pattern (0-23)
@@ -3420,7 +4023,7 @@ async def yearly_time_patterns(year: int):
 
 
 @app.get("/api/yearly/evolution")
-async def yearly_evolution(
+def yearly_evolution(
     year: int, item_type: str = "artists", top_n: int = 5
 ) -> dict:
     """Get evolution of items that appeared in monthly top N throughout the year.
@@ -3442,7 +4045,7 @@ async def yearly_evolution(
     dict
         Contains dates, item names, and their play counts over time
     """
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
 
         # Generate all months in the year
@@ -3605,9 +4208,9 @@ def _aggregate_genres(
 
 
 @app.get("/genre-stats", response_class=HTMLResponse)
-async def genre_stats_page(request: Request):
+def genre_stats_page(request: Request):
     """Genre statistics page."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         years = [
             row[0]
             for row in conn.execute(
@@ -3620,9 +4223,9 @@ async def genre_stats_page(request: Request):
 
 
 @app.get("/html/genre/top-genres", response_class=HTMLResponse)
-async def genre_top_genres(request: Request, limit: int = 20):
+def genre_top_genres(request: Request, limit: int = 20):
     """Top genres overall as HTML fragment."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         rows = conn.execute(
             """SELECT m.artist, COUNT(*) as plays, ag.tags
                FROM musiclibrary m
@@ -3637,9 +4240,9 @@ async def genre_top_genres(request: Request, limit: int = 20):
 
 
 @app.get("/html/genre/top-genres-year", response_class=HTMLResponse)
-async def genre_top_genres_year(request: Request, year: str, limit: int = 20):
+def genre_top_genres_year(request: Request, year: str, limit: int = 20):
     """Top genres for a specific year as HTML fragment."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         rows = conn.execute(
             """SELECT m.artist, COUNT(*) as plays, ag.tags
                FROM musiclibrary m
@@ -3656,9 +4259,9 @@ async def genre_top_genres_year(request: Request, year: str, limit: int = 20):
 
 
 @app.get("/charts/genre/evolution")
-async def genre_evolution_chart(limit: int = 25):
+def genre_evolution_chart(limit: int = 25):
     """Genre share over years as a heatmap — genres × years, color = % share."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         rows = conn.execute(
             """SELECT strftime('%Y', m.timestamp, 'unixepoch') as year,
                       m.artist, COUNT(*) as plays, ag.tags
@@ -3756,9 +4359,9 @@ async def genre_evolution_chart(limit: int = 25):
 
 
 @app.get("/charts/genre/ranking")
-async def genre_ranking_chart():
+def genre_ranking_chart():
     """Animated bar chart race — top 10 genres per year, slider controls year."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         rows = conn.execute(
             """SELECT strftime('%Y', m.timestamp, 'unixepoch') as year,
                       m.artist, COUNT(*) as plays, ag.tags
@@ -3966,9 +4569,9 @@ async def genre_ranking_chart():
 
 
 @app.get("/genre/{genre_name}", response_class=HTMLResponse)
-async def genre_detail(request: Request, genre_name: str):
+def genre_detail(request: Request, genre_name: str):
     """Detail page for a specific genre."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         rows = conn.execute(
             "SELECT artist, tags FROM artist_genres WHERE tags != '[]'"
         ).fetchall()
@@ -3987,7 +4590,7 @@ async def genre_detail(request: Request, genre_name: str):
     artist_list = list(genre_weights.keys())
     placeholders = ",".join("?" * len(artist_list))
 
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         play_rows = conn.execute(
             f"SELECT artist, COUNT(*) as plays FROM musiclibrary WHERE artist IN ({placeholders}) GROUP BY artist",
             artist_list,
@@ -4045,9 +4648,9 @@ async def genre_detail(request: Request, genre_name: str):
 
 
 @app.get("/discovery", response_class=HTMLResponse)
-async def discovery_page(request: Request):
+def discovery_page(request: Request):
     """Music discovery timeline — artists sorted by first scrobble date."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         rows = conn.execute(
             """SELECT artist, MIN(timestamp) as first_heard, COUNT(*) as total_plays
                FROM musiclibrary GROUP BY artist ORDER BY first_heard ASC"""
@@ -4086,9 +4689,9 @@ async def artist_stats_page(request: Request):
 
 
 @app.get("/charts/artist-loyalty")
-async def artist_loyalty_chart():
+def artist_loyalty_chart():
     """Scatter: listening span vs total plays for top 100 artists."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         rows = conn.execute(
             """SELECT artist,
                       MIN(timestamp) as first_ts,
@@ -4174,9 +4777,9 @@ async def artist_loyalty_chart():
 
 
 @app.get("/all-time", response_class=HTMLResponse)
-async def all_time_page(request: Request):
+def all_time_page(request: Request):
     """All-time top charts page."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         stats = _get_dashboard_stats(conn)
     return templates.TemplateResponse(request, "alltime.html", {**stats})
 
@@ -4187,7 +4790,7 @@ async def all_time_page(request: Request):
 
 
 @app.get("/data/timeline")
-async def data_timeline(
+def data_timeline(
     time_range: str = Query("all", alias="range", pattern="^(year|all)$"),
 ) -> dict:
     """Daily play counts and 7-day rolling average for Chart.js timeline.
@@ -4203,7 +4806,7 @@ async def data_timeline(
         Keys: ``labels`` (date strings), ``plays`` (int list), ``rolling``
         (float list, 7-day centred rolling mean).
     """
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         cursor = conn.cursor()
         if time_range == "all":
             cursor.execute("""
@@ -4223,17 +4826,17 @@ async def data_timeline(
     if not result:
         return {"labels": [], "plays": [], "rolling": []}
 
-    df = pd.DataFrame(result, columns=["date", "plays"])
-    df["rolling7"] = df["plays"].rolling(7, center=True, min_periods=1).mean()
+    # DATE() already yields the ISO labels Chart.js needs
+    plays = [count for _, count in result]
     return {
-        "labels": df["date"].tolist(),
-        "plays": df["plays"].tolist(),
-        "rolling": df["rolling7"].round(1).tolist(),
+        "labels": [date for date, _ in result],
+        "plays": plays,
+        "rolling": [round(mean, 1) for mean in _rolling_mean(plays, 7)],
     }
 
 
 @app.get("/data/accumulated-listens")
-async def data_accumulated_listens(
+def data_accumulated_listens(
     item_type: str = "artists", limit: int = 10, align: bool = False
 ) -> dict:
     """Cumulative listen count data for top N items, for Chart.js.
@@ -4253,7 +4856,7 @@ async def data_accumulated_listens(
         Keys: ``months`` (list or None), ``datasets`` (list of label+data),
         ``aligned`` (bool).
     """
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         if item_type == "artists":
             rows = conn.execute(
                 """SELECT strftime('%Y-%m', m.timestamp, 'unixepoch') as month,
@@ -4343,7 +4946,7 @@ async def data_accumulated_listens(
 
 
 @app.get("/data/time-spent")
-async def data_time_spent_chartjs(item_type: str = "artists", limit: int = 50) -> dict:
+def data_time_spent_chartjs(item_type: str = "artists", limit: int = 50) -> dict:
     """Total listening time data for top N items, for Chart.js horizontal bar.
 
     Parameters
@@ -4359,7 +4962,7 @@ async def data_time_spent_chartjs(item_type: str = "artists", limit: int = 50) -
         Keys: ``labels`` (reversed, bottom-to-top), ``values`` (hours),
         ``hover`` (formatted strings).
     """
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         if item_type == "artists":
             rows = conn.execute(
                 """SELECT (SELECT m2.artist FROM musiclibrary m2
@@ -4419,7 +5022,7 @@ async def data_time_spent_chartjs(item_type: str = "artists", limit: int = 50) -
 
 
 @app.get("/charts/accumulated-listens")
-async def accumulated_listens_chart(
+def accumulated_listens_chart(
     item_type: str = "artists", limit: int = 50, align: bool = False
 ) -> dict:
     """Cumulative listen count over time for top N artists/albums/songs.
@@ -4439,7 +5042,7 @@ async def accumulated_listens_chart(
     dict
         Plotly figure dict.
     """
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         if item_type == "artists":
             rows = conn.execute(
                 """SELECT strftime('%Y-%m', m.timestamp, 'unixepoch') as month,
@@ -4486,7 +5089,7 @@ async def accumulated_listens_chart(
             ).fetchall()
 
     if not rows:
-        return go.Figure().to_dict()
+        return _empty_figure()
 
     df = pd.DataFrame(rows, columns=["month", "label", "plays"])
     pivot = df.pivot(index="month", columns="label", values="plays")
@@ -4536,9 +5139,9 @@ async def accumulated_listens_chart(
 
 
 @app.get("/charts/time-spent")
-async def time_spent_chart(item_type: str = "artists", limit: int = 50):
+def time_spent_chart(item_type: str = "artists", limit: int = 50):
     """Total time spent on top N artists/albums/songs as a horizontal bar chart."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection() as conn:
         if item_type == "artists":
             rows = conn.execute(
                 """SELECT m.artist as label, SUM(td.duration_ms) as total_ms
@@ -4576,7 +5179,7 @@ async def time_spent_chart(item_type: str = "artists", limit: int = 50):
             ).fetchall()
 
     if not rows:
-        return go.Figure().to_dict()
+        return _empty_figure()
 
     labels = [row[0] for row in rows][::-1]
     ms_vals = [row[1] for row in rows][::-1]
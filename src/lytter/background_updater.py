@@ -22,10 +22,7 @@ def update_database():
     logger.info("Starting automatic database update")
 
     try:
-        # Initialize database if needed
-        init_db()
-
-        # Perform incremental update
+        # Perform incremental update; the schema is set up once in main()
         downloader = GetScrobbles()
         new_scrobbles = downloader.get_scrobbles()
 
@@ -54,6 +51,9 @@ def main():
         misfire_grace_time=300,  # Allow up to 5 minutes delay
     )
 
+    # Initialize database if needed
+    init_db()
+
     # Run initial update
     logger.info("Running initial update...")
     update_database()
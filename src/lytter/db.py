@@ -0,0 +1,42 @@
+"""Database location and queries shared with the lightweight CLI tools.
+
+Kept free of the web and Last.fm dependencies so that commands such as
+``lytter-status`` start without importing ``lytter.app``.
+"""
+
+import sqlite3
+from pathlib import Path
+
+DB_NAME = Path("music.db")
+
+
+def library_counts(conn: sqlite3.Connection) -> dict[str, int]:
+    """Count scrobbles and distinct artists, tracks and albums.
+
+    Reads the trigger-maintained ``stats_summary`` table, falling back to
+    scanning ``musiclibrary`` for databases not set up by ``init_db``.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Open database connection.
+
+    Returns
+    -------
+    dict[str, int]
+        Keys: total_scrobbles, unique_artists, unique_tracks, unique_albums.
+    """
+    keys = ("total_scrobbles", "unique_artists", "unique_tracks", "unique_albums")
+    try:
+        summary = dict(conn.execute("SELECT k, v FROM stats_summary"))
+    except sqlite3.OperationalError:
+        summary = {}
+    if all(key in summary for key in keys):
+        return {key: summary[key] for key in keys}
+
+    row = conn.execute("""
+        SELECT COUNT(*), COUNT(DISTINCT artist_key), COUNT(DISTINCT track_key),
+               COUNT(DISTINCT NULLIF(album_key, ''))
+        FROM musiclibrary
+    """).fetchone()
+    return dict(zip(keys, row, strict=True))
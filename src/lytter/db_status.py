@@ -2,84 +2,153 @@
 """Check database status and statistics."""
 
 import datetime
+import json
 import sqlite3
+import time
+from pathlib import Path
 
-from lytter.app import DB_NAME
+from lytter.db import DB_NAME, library_counts
 
 # Constants
 SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 24 * SECONDS_PER_HOUR
+STATUS_CACHE = Path("~/.cache/lytter/status.json").expanduser()
+
+
+def _connect_readonly() -> sqlite3.Connection:
+    """Open the database read-only, without creating it when it is missing."""
+    conn = sqlite3.connect(f"{Path(DB_NAME).absolute().as_uri()}?mode=ro", uri=True)
+    conn.execute("PRAGMA mmap_size=268435456")  # 256 MiB, for the fallback scans
+    return conn
+
+
+def _db_fingerprint() -> list:
+    """Identify the current database contents by path and file mtimes.
+
+    In WAL mode commits only touch the ``-wal`` file until a checkpoint, so
+    both files are part of the fingerprint.
+    """
+    db = Path(DB_NAME).absolute()
+    wal = db.with_name(f"{db.name}-wal")
+    wal_mtime = wal.stat().st_mtime_ns if wal.exists() else 0
+    return [str(db), db.stat().st_mtime_ns, wal_mtime]
+
+
+def _load_cached_stats(fingerprint: list) -> dict | None:
+    """Return the cached stats when they were computed for ``fingerprint``."""
+    try:
+        cached = json.loads(STATUS_CACHE.read_text())
+    except (OSError, ValueError):
+        return None
+    if cached.get("fingerprint") != fingerprint:
+        return None
+    return cached["stats"]
+
+
+def _store_cached_stats(fingerprint: list, stats: dict) -> None:
+    """Persist ``stats`` for ``fingerprint``; failures only cost the cache."""
+    try:
+        STATUS_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        STATUS_CACHE.write_text(
+            json.dumps({"fingerprint": fingerprint, "stats": stats})
+        )
+    except OSError:
+        pass
+
+
+def invalidate_status_cache() -> None:
+    """Drop the cached status so the next report re-reads the database."""
+    STATUS_CACHE.unlink(missing_ok=True)
+
+
+def _collect_stats() -> dict:
+    """Read totals, the timestamp range and the derived span/average."""
+    with _connect_readonly() as conn:
+        # Totals come from the trigger-maintained summary table; MIN/MAX
+        # are each a single seek on the UNIQUE(timestamp) index
+        counts = library_counts(conn)
+        row = conn.execute(
+            """
+            SELECT latest, oldest, (latest - oldest) / :day,
+                   CAST(:total AS REAL) / MAX(1, (latest - oldest) / :day)
+            FROM (SELECT (SELECT MAX(timestamp) FROM musiclibrary) AS latest,
+                         (SELECT MIN(timestamp) FROM musiclibrary) AS oldest)
+            """,
+            {"day": SECONDS_PER_DAY, "total": counts["total_scrobbles"]},
+        ).fetchone()
+    latest_timestamp, oldest_timestamp, span_days, avg_per_day = row
+    return {
+        "total_scrobbles": counts["total_scrobbles"],
+        "unique_artists": counts["unique_artists"],
+        "unique_tracks": counts["unique_tracks"],
+        "latest_timestamp": latest_timestamp,
+        "oldest_timestamp": oldest_timestamp,
+        "span_days": span_days,
+        "avg_per_day": avg_per_day,
+    }
+
+
+def _format_report(stats: dict, now: int) -> list[str]:
+    """Render the status report lines for ``stats`` as of ``now``."""
+    latest_timestamp = stats["latest_timestamp"]
+    oldest_timestamp = stats["oldest_timestamp"]
+    lines = [
+        "📊 Last.fm Database Status",
+        "=" * 40,
+        f"Total scrobbles: {stats['total_scrobbles']:,}",
+        f"Unique artists: {stats['unique_artists']:,}",
+        f"Unique tracks: {stats['unique_tracks']:,}",
+    ]
+
+    if latest_timestamp:
+        latest_date = datetime.datetime.fromtimestamp(int(latest_timestamp))
+        lines.append(f"Latest scrobble: {latest_date}")
+
+        # Calculate how old the latest scrobble is
+        days, seconds = divmod(now - int(latest_timestamp), SECONDS_PER_DAY)
+
+        if days > 0:
+            lines.append(f"⚠️  Database is {days} days behind")
+        elif seconds > SECONDS_PER_HOUR:
+            hours = seconds // SECONDS_PER_HOUR
+            lines.append(f"⚠️  Database is {hours} hours behind")
+        else:
+            lines.append("✅ Database is up to date")
+
+    if oldest_timestamp:
+        oldest_date = datetime.datetime.fromtimestamp(int(oldest_timestamp))
+        lines.append(f"Oldest scrobble: {oldest_date}")
+
+    if stats["span_days"] is not None:
+        lines.append(f"Data span: {stats['span_days']:,} days")
+
+    if stats["total_scrobbles"] and stats["avg_per_day"] is not None:
+        lines.append(f"Average: {stats['avg_per_day']:.1f} scrobbles/day")
+
+    return lines
 
 
 def main():
-    """Show database status."""
+    """Show database status.
+
+    The stats only change when the database does, so they are cached in
+    ``STATUS_CACHE`` keyed on the database file mtimes. The report is built
+    in full and written with a single call, so it never appears half-done.
+    """
     try:
-        with sqlite3.connect(DB_NAME) as conn:
-            cursor = conn.cursor()
-
-            # Get total scrobbles
-            cursor.execute("SELECT COUNT(*) FROM musiclibrary")
-            total_scrobbles = cursor.fetchone()[0]
-
-            # Get latest scrobble
-            cursor.execute("SELECT MAX(timestamp) FROM musiclibrary")
-            latest_timestamp = cursor.fetchone()[0]
-
-            # Get oldest scrobble
-            cursor.execute("SELECT MIN(timestamp) FROM musiclibrary")
-            oldest_timestamp = cursor.fetchone()[0]
-
-            # Get unique artists
-            cursor.execute("SELECT COUNT(DISTINCT artist_key) FROM musiclibrary")
-            unique_artists = cursor.fetchone()[0]
-
-            # Get unique tracks
-            cursor.execute("SELECT COUNT(DISTINCT track_key) FROM musiclibrary")
-            unique_tracks = cursor.fetchone()[0]
-
-        print("📊 Last.fm Database Status")
-        print("=" * 40)
-        print(f"Total scrobbles: {total_scrobbles:,}")
-        print(f"Unique artists: {unique_artists:,}")
-        print(f"Unique tracks: {unique_tracks:,}")
-
-        if latest_timestamp:
-            latest_date = datetime.datetime.fromtimestamp(int(latest_timestamp))
-            print(f"Latest scrobble: {latest_date}")
-
-            # Calculate how old the latest scrobble is
-            time_diff = datetime.datetime.now() - latest_date
-
-            if time_diff.days > 0:
-                print(f"⚠️  Database is {time_diff.days} days behind")
-            elif time_diff.seconds > SECONDS_PER_HOUR:
-                hours = time_diff.seconds // SECONDS_PER_HOUR
-                print(f"⚠️  Database is {hours} hours behind")
-            else:
-                print("✅ Database is up to date")
-
-        if oldest_timestamp:
-            oldest_date = datetime.datetime.fromtimestamp(int(oldest_timestamp))
-            print(f"Oldest scrobble: {oldest_date}")
-
-            # Calculate span
-            if latest_timestamp and oldest_timestamp:
-                span_days = (int(latest_timestamp) - int(oldest_timestamp)) // (
-                    24 * 3600
-                )
-                print(f"Data span: {span_days:,} days")
-
-        # Calculate average scrobbles per day
-        if total_scrobbles and latest_timestamp and oldest_timestamp:
-            span_days = max(
-                1, (int(latest_timestamp) - int(oldest_timestamp)) // (24 * 3600)
-            )
-            avg_per_day = total_scrobbles / span_days
-            print(f"Average: {avg_per_day:.1f} scrobbles/day")
-
-    except sqlite3.OperationalError:
-        print("❌ Database not found. Run 'uv run python update_db.py' to initialize.")
+        fingerprint = _db_fingerprint()
+        stats = _load_cached_stats(fingerprint)
+        if stats is None:
+            stats = _collect_stats()
+            _store_cached_stats(fingerprint, stats)
+        report = "\n".join(_format_report(stats, int(time.time())))
+    except (FileNotFoundError, sqlite3.OperationalError):
+        report = (
+            "❌ Database not found. Run 'uv run python update_db.py' to initialize."
+        )
     except Exception as e:
-        print(f"❌ Error: {e}")
+        report = f"❌ Error: {e}"
+    print(report)
 
 
 if __name__ == "__main__":
@@ -5,7 +5,12 @@ import argparse
 import sqlite3
 import sys
 
-from lytter.app import DB_NAME, fetch_and_cache_durations, init_db
+from lytter.app import (
+    DB_NAME,
+    fetch_and_cache_durations,
+    get_db_connection,
+    init_db,
+)
 
 
 def _get_tracks(
@@ -101,7 +106,7 @@ def main() -> None:
 
     init_db()
 
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection(DB_NAME) as conn:
         tracks = _get_tracks(conn, retry_failed=args.retry_failed, force=args.force)
 
     if args.limit > 0:
@@ -122,7 +127,7 @@ def main() -> None:
             print(f"[{i}/{total}] {artist} - {track}", flush=True)
             fetch_and_cache_durations([(artist, track, mbid)])
             # Check outcome
-            with sqlite3.connect(DB_NAME) as conn:
+            with get_db_connection(DB_NAME) as conn:
                 row = conn.execute(
                     "SELECT duration_ms FROM track_durations WHERE artist = ? AND track = ?",
                     (artist, track),
@@ -3,13 +3,18 @@
 
 import argparse
 import os
-import sqlite3
 from datetime import datetime, timedelta
 
-import requests
 from dotenv import load_dotenv
 
-from lytter.app import DB_NAME, normalize_name
+from lytter.app import (
+    DB_NAME,
+    LASTFM_API_URL,
+    SCROBBLE_INSERT_SQL,
+    get_db_connection,
+    lastfm_session,
+    scrobble_row,
+)
 
 load_dotenv()
 
@@ -24,53 +29,65 @@ def find_timestamp_gaps(hours_back=24, gap_threshold=3600):
         hours_back: How many hours back to check
         gap_threshold: Gap in seconds that's considered suspicious (default 1 hour)
     """
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection(DB_NAME) as conn:
         cursor = conn.cursor()
 
-        # Get timestamps from last N hours
         cutoff_time = int((datetime.now() - timedelta(hours=hours_back)).timestamp())
 
+        # Let SQLite pair each scrobble with its predecessor so only the gaps
+        # themselves cross over into Python
         cursor.execute(
             """
-            SELECT timestamp FROM musiclibrary
-            WHERE timestamp > ?
-            ORDER BY timestamp DESC
+            SELECT ts, prev_ts, ts - prev_ts AS gap
+            FROM (
+                SELECT timestamp AS ts,
+                       LAG(timestamp) OVER (ORDER BY timestamp) AS prev_ts
+                FROM musiclibrary
+                WHERE timestamp > ?
+            )
+            WHERE ts - prev_ts > ?
+            ORDER BY ts DESC
         """,
-            (cutoff_time,),
+            (cutoff_time, gap_threshold),
         )
 
-        timestamps = [row[0] for row in cursor.fetchall()]
-
-    gaps = []
-    for i in range(len(timestamps) - 1):
-        gap = int(timestamps[i]) - int(timestamps[i + 1])
-        if gap > gap_threshold:
-            gaps.append(
-                {
-                    "newer_ts": timestamps[i],
-                    "older_ts": timestamps[i + 1],
-                    "gap_seconds": gap,
-                    "newer_time": datetime.fromtimestamp(int(timestamps[i])),
-                    "older_time": datetime.fromtimestamp(int(timestamps[i + 1])),
-                }
-            )
+        gaps = [
+            {
+                "newer_ts": newer_ts,
+                "older_ts": older_ts,
+                "gap_seconds": gap,
+                "newer_time": datetime.fromtimestamp(newer_ts),
+                "older_time": datetime.fromtimestamp(older_ts),
+            }
+            for newer_ts, older_ts, gap in cursor
+        ]
 
     return gaps
 
 
 def fetch_scrobbles_in_range(from_timestamp, to_timestamp):
-    """Fetch scrobbles from Last.fm API in a specific time range."""
-    url = "https://ws.audioscrobbler.com/2.0/?method=user.getrecenttracks&user={}&api_key={}&limit=200&from={}&to={}&page={}&format=json"
+    """Fetch scrobbles from Last.fm API in a specific time range.
+
+    Returns ``musiclibrary`` rows as built by ``scrobble_row``.
+    """
+    params = {
+        "method": "user.getrecenttracks",
+        "user": USER_NAME,
+        "api_key": API_KEY,
+        "limit": 200,
+        "from": from_timestamp,
+        "to": to_timestamp,
+        "format": "json",
+    }
 
     all_scrobbles = []
     page = 1
 
     while True:
         try:
-            request_url = url.format(
-                USER_NAME, API_KEY, from_timestamp, to_timestamp, page
+            response = lastfm_session.get(
+                LASTFM_API_URL, params={**params, "page": page}, timeout=30
             )
-            response = requests.get(request_url, timeout=30)
             response.raise_for_status()
             data = response.json()
 
@@ -91,17 +108,7 @@ def fetch_scrobbles_in_range(from_timestamp, to_timestamp):
                     continue
 
                 if "date" in track:
-                    all_scrobbles.append(
-                        {
-                            "artist": track["artist"]["#text"],
-                            "artist_mbid": track["artist"]["mbid"],
-                            "album": track["album"]["#text"],
-                            "album_mbid": track["album"]["mbid"],
-                            "track": track["name"],
-                            "track_mbid": track["mbid"],
-                            "timestamp": int(track["date"]["uts"]),
-                        }
-                    )
+                    all_scrobbles.append(scrobble_row(track, int(track["date"]["uts"])))
 
             # Check if we have more pages
             total_pages = int(data["recenttracks"]["@attr"]["totalPages"])
@@ -123,7 +130,7 @@ def fill_gaps(gaps, dry_run=True):
         print("No gaps found!")
         return 0
 
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection(DB_NAME) as conn:
         cursor = conn.cursor()
         total_added = 0
 
@@ -136,42 +143,24 @@ def fill_gaps(gaps, dry_run=True):
             scrobbles = fetch_scrobbles_in_range(gap["older_ts"], gap["newer_ts"])
             print(f"Found {len(scrobbles)} scrobbles from API in this range")
 
-            added_count = 0
-            for scrobble in scrobbles:
-                # Check if this scrobble already exists
+            # Keyed by timestamp (row[6]) so repeated API rows collapse to one
+            missing = {row[6]: row for row in scrobbles}
+
+            if dry_run:
+                # One range lookup for the whole gap instead of a query per scrobble
                 cursor.execute(
-                    "SELECT 1 FROM musiclibrary WHERE timestamp = ?",
-                    (scrobble["timestamp"],),
+                    "SELECT timestamp FROM musiclibrary WHERE timestamp BETWEEN ? AND ?",
+                    (gap["older_ts"], gap["newer_ts"]),
                 )
-                if not cursor.fetchone():
-                    if not dry_run:
-                        try:
-                            cursor.execute(
-                                """
-                                INSERT INTO musiclibrary
-                                (artist, artist_mbid, album, album_mbid, track, track_mbid, timestamp,
-                                 artist_key, album_key, track_key)
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            """,
-                                (
-                                    scrobble["artist"],
-                                    scrobble["artist_mbid"],
-                                    scrobble["album"],
-                                    scrobble["album_mbid"],
-                                    scrobble["track"],
-                                    scrobble["track_mbid"],
-                                    scrobble["timestamp"],
-                                    normalize_name(scrobble["artist"], "artist"),
-                                    normalize_name(scrobble["album"] or "", "album"),
-                                    normalize_name(scrobble["track"], "track"),
-                                ),
-                            )
-                            conn.commit()
-                            added_count += 1
-                        except sqlite3.IntegrityError:
-                            pass  # Already exists
-                    else:
-                        added_count += 1
+                existing = {row[0] for row in cursor.fetchall()}
+                added_count = len(missing.keys() - existing)
+            elif missing:
+                # The UNIQUE(timestamp) constraint skips rows we already have
+                with conn:
+                    cursor.executemany(SCROBBLE_INSERT_SQL, missing.values())
+                added_count = cursor.rowcount
+            else:
+                added_count = 0
 
             if dry_run:
                 print(f"Would add {added_count} missing scrobbles")
@@ -10,6 +10,7 @@ from lytter.app import (
     DB_NAME,
     fetch_and_cache_artist_genres,
     fetch_and_cache_artist_metadata,
+    get_db_connection,
     init_db,
 )
 
@@ -108,7 +109,7 @@ def main() -> None:
 
     init_db()
 
-    with sqlite3.connect(DB_NAME) as conn:
+    with get_db_connection(DB_NAME) as conn:
         artists = _get_artists(conn, retry_empty=args.retry_empty, force=args.force)
 
     if args.limit > 0:
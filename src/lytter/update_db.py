@@ -5,12 +5,20 @@ import argparse
 import sqlite3
 import sys
 
-from lytter.app import DB_NAME, MINIMUM_VALID_TIMESTAMP, GetScrobbles, init_db
+from lytter.app import (
+    DB_NAME,
+    LASTFM_MAX_CONNECTIONS,
+    MINIMUM_VALID_TIMESTAMP,
+    GetScrobbles,
+    get_db_connection,
+    init_db,
+)
+from lytter.db_status import invalidate_status_cache
 
 
-def remove_corrupt_timestamps() -> int:
+def remove_corrupt_timestamps(conn: sqlite3.Connection) -> int:
     """Delete scrobbles with timestamps before 2000-01-01 (corrupt epoch artifacts)."""
-    with sqlite3.connect(DB_NAME) as conn:
+    with conn:
         cursor = conn.cursor()
         cursor.execute(
             "DELETE FROM musiclibrary WHERE timestamp < ?",
@@ -20,6 +28,17 @@ def remove_corrupt_timestamps() -> int:
         return cursor.rowcount
 
 
+def optimize_db(conn: sqlite3.Connection) -> None:
+    """Refresh planner statistics that the update may have made stale.
+
+    ``PRAGMA optimize`` only re-analyzes tables whose row counts changed a
+    lot, and ``analysis_limit`` caps each ANALYZE at a sample of rows.
+    """
+    with conn:
+        conn.execute("PRAGMA analysis_limit=1000")
+        conn.execute("PRAGMA optimize")
+
+
 def main():
     """Update the Last.fm scrobbles database."""
     parser = argparse.ArgumentParser(description="Update Last.fm scrobbles database")
@@ -45,26 +64,56 @@ def main():
         help="Thorough incremental update (checks more pages, slower but more reliable)",
     )
 
+    parser.add_argument(
+        "--yes",
+        "-y",
+        action="store_true",
+        help="Skip the confirmation prompt for --full (for scripted runs)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help=(
+            "Number of Last.fm pages to fetch in parallel during full updates "
+            f"(1-{LASTFM_MAX_CONNECTIONS}). This hides request latency only: "
+            "requests still start at most one per 0.2 s to respect Last.fm's "
+            "rate limit"
+        ),
+    )
+
     args = parser.parse_args()
+    if not 1 <= args.concurrency <= LASTFM_MAX_CONNECTIONS:
+        parser.error(f"--concurrency must be between 1 and {LASTFM_MAX_CONNECTIONS}")
 
     # Initialize database if it doesn't exist
     init_db()
+    # One connection for the cleanup, every downloaded page and the optimize
+    conn = get_db_connection(DB_NAME)
 
     if args.clean_corrupt:
-        deleted = remove_corrupt_timestamps()
+        deleted = remove_corrupt_timestamps(conn)
         print(f"Removed {deleted} scrobble(s) with corrupt timestamps (pre-2000).")
+        optimize_db(conn)
+        invalidate_status_cache()
         return
 
-    # Create downloader
-    downloader = GetScrobbles()
+    # Create downloader; every page commits through the same connection
+    downloader = GetScrobbles(conn=conn)
+    downloader.batch_size = 1000
+    downloader.max_workers = args.concurrency
 
     if args.full:
         print("🔄 Starting FULL database update...")
         print("⚠️  This will download your entire Last.fm history and may take a while!")
-        confirm = input("Are you sure? (y/N): ")
-        if confirm.lower() != "y":
-            print("Cancelled.")
-            sys.exit(0)
+        if not args.yes:
+            try:
+                confirm = input("Are you sure? (y/N): ")
+            except EOFError:  # No terminal attached, e.g. under cron
+                confirm = ""
+            if confirm.lower() != "y":
+                print("Cancelled. Pass --yes to skip this prompt.")
+                sys.exit(0)
         downloader.get_scrobbles(full=True, pages=args.pages)
     elif args.thorough:
         print("🔄 Starting THOROUGH incremental update...")
@@ -78,6 +127,8 @@ def main():
         print("🔄 Starting quick incremental database update...")
         downloader.get_scrobbles(pages=args.pages)
 
+    optimize_db(conn)
+    invalidate_status_cache()
     print("✅ Database update completed!")
 
 
@@ -10,6 +10,13 @@ import lytter.app as app_module
 from lytter.app import app, normalize_name
 
 
+@pytest.fixture(autouse=True)
+def _close_db_connections():
+    """Close cached connections so tests do not leak them to deleted tmp DBs."""
+    yield
+    app_module.close_db_connections()
+
+
 @pytest.fixture()
 def test_db(tmp_path, monkeypatch):
     """File-based SQLite DB in tmp_path with schema + sample data, DB_NAME monkeypatched."""
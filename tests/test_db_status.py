@@ -0,0 +1,105 @@
+"""Tests for the database status report."""
+
+import sqlite3
+import subprocess
+import sys
+import time
+
+import pytest
+
+import lytter.app as app_module
+from lytter import db_status
+
+
+@pytest.fixture(autouse=True)
+def status_cache(tmp_path, monkeypatch):
+    """Keep the status cache out of the user's home directory."""
+    cache = tmp_path / "cache" / "status.json"
+    monkeypatch.setattr(db_status, "STATUS_CACHE", cache)
+    return cache
+
+
+def test_status_reports_library_totals(test_db, monkeypatch, capsys):
+    """The report shows scrobble, artist and track totals and freshness."""
+    monkeypatch.setattr(db_status, "DB_NAME", test_db)
+
+    db_status.main()
+
+    out = capsys.readouterr().out
+    assert "Total scrobbles: 3" in out
+    assert "Unique artists: 2" in out
+    assert "Unique tracks: 3" in out
+    assert "Database is up to date" in out
+    assert "Data span: 0 days" in out
+    assert "Average: 3.0 scrobbles/day" in out
+
+
+def test_status_reads_summary_table(tmp_path, monkeypatch, capsys):
+    """Totals come from stats_summary when init_db has set it up."""
+    db = tmp_path / "status.db"
+    monkeypatch.setattr(app_module, "DB_NAME", db)
+    monkeypatch.setattr(db_status, "DB_NAME", db)
+    app_module.init_db()
+    with sqlite3.connect(db) as conn:
+        conn.execute("UPDATE stats_summary SET v = 42 WHERE k = 'total_scrobbles'")
+
+    db_status.main()
+
+    assert "Total scrobbles: 42" in capsys.readouterr().out
+
+
+def test_status_does_not_create_missing_database(tmp_path, monkeypatch, capsys):
+    """A missing database is reported instead of being created empty."""
+    db = tmp_path / "missing.db"
+    monkeypatch.setattr(db_status, "DB_NAME", db)
+
+    db_status.main()
+
+    assert "Database not found" in capsys.readouterr().out
+    assert not db.exists()
+
+
+def test_status_is_served_from_cache_until_db_changes(
+    test_db, status_cache, monkeypatch, capsys
+):
+    """A second run skips SQLite; writing to the database invalidates the cache."""
+    monkeypatch.setattr(db_status, "DB_NAME", test_db)
+    collect_stats = db_status._collect_stats
+    db_status.main()
+    assert status_cache.exists()
+
+    def fail():
+        raise AssertionError("database should not be queried")
+
+    monkeypatch.setattr(db_status, "_collect_stats", fail)
+    db_status.main()
+    assert capsys.readouterr().out.count("Total scrobbles: 3") == 2  # noqa: PLR2004
+
+    monkeypatch.setattr(db_status, "_collect_stats", collect_stats)
+    with sqlite3.connect(test_db) as conn:
+        conn.execute("DELETE FROM musiclibrary WHERE track = 'Karma Police'")
+    db_status.main()
+    assert "Total scrobbles: 2" in capsys.readouterr().out
+
+
+def test_status_reports_hours_and_days_behind(test_db, monkeypatch, capsys):
+    """Freshness is reported in whole days, or hours when under a day."""
+    monkeypatch.setattr(db_status, "DB_NAME", test_db)
+    now = time.time()
+
+    monkeypatch.setattr(db_status.time, "time", lambda: now + 3 * 3600)
+    db_status.main()
+    assert "Database is 3 hours behind" in capsys.readouterr().out
+
+    monkeypatch.setattr(db_status.time, "time", lambda: now + 2 * 86400)
+    db_status.main()
+    assert "Database is 2 days behind" in capsys.readouterr().out
+
+
+def test_status_does_not_import_the_web_app():
+    """The status command stays clear of the FastAPI/Last.fm import cost."""
+    code = "import sys, lytter.db_status; print('lytter.app' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "False"
@@ -1,6 +1,12 @@
 """Tests for HTMX HTML fragment endpoints."""
 
-import lytter.app as app_module  # noqa: F401  (ensures DB_NAME is patchable)
+import sqlite3
+import time
+
+from fastapi.testclient import TestClient
+
+import lytter.app as app_module
+from lytter.app import normalize_name
 
 
 def test_recent_plays_returns_html(client):
@@ -31,6 +37,16 @@ def test_timeline_default_returns_json(client):
     assert "layout" in data
 
 
+def test_data_timeline_returns_daily_series(client):
+    """/data/timeline returns per-day plays with a matching rolling average."""
+    response = client.get("/data/timeline?range=year")
+    assert response.status_code == 200  # noqa: PLR2004
+    data = response.json()
+    assert sum(data["plays"]) == 3  # noqa: PLR2004
+    assert len(data["labels"]) == len(data["plays"]) == len(data["rolling"])
+    assert data["labels"] == sorted(data["labels"])
+
+
 def test_timeline_range_all_returns_json(client):
     """Test that /charts/listening-timeline?range=all returns valid Plotly JSON."""
     response = client.get("/charts/listening-timeline?range=all")
@@ -38,3 +54,150 @@ def test_timeline_range_all_returns_json(client):
     data = response.json()
     assert "data" in data
     assert "layout" in data
+
+
+class _FakeNowPlaying:
+    artist = "Radiohead"
+    title = "Airbag"
+
+    def get_album(self):
+        return "OK Computer"
+
+
+class _FakeNetwork:
+    def __init__(self):
+        self.calls = 0
+
+    def get_user(self, _name):
+        self.calls += 1
+        return type("U", (), {"get_now_playing": lambda _self: _FakeNowPlaying()})()
+
+
+def test_index_does_not_wait_on_now_playing(client, monkeypatch):
+    """The dashboard renders without Last.fm calls and lazy-loads the card."""
+    fake = _FakeNetwork()
+    monkeypatch.setattr(app_module, "get_network", lambda: fake)
+    response = client.get("/")
+    assert response.status_code == 200  # noqa: PLR2004
+    assert 'hx-get="/html/now-playing"' in response.text
+    assert fake.calls == 0
+
+
+def test_now_playing_returns_html(client, monkeypatch):
+    """Test that /html/now-playing renders the current track card."""
+    fake = _FakeNetwork()
+    monkeypatch.setattr(app_module, "get_network", lambda: fake)
+    response = client.get("/html/now-playing")
+    assert response.status_code == 200  # noqa: PLR2004
+    assert "Airbag" in response.text
+    assert "OK Computer" in response.text
+
+    client.get("/html/now-playing")
+    assert fake.calls == 1
+
+
+def test_recent_stats_returns_top_items(client):
+    """Test that /recent-stats ranks artists, albums and songs for both windows."""
+    response = client.get("/recent-stats")
+    assert response.status_code == 200  # noqa: PLR2004
+    data = response.json()
+    for period in ("week", "month"):
+        assert data[f"{period}_artists"][0] == {"artist": "Radiohead", "plays": 2}
+        assert data[f"{period}_albums"][0]["album"] == "OK Computer"
+        # Every song has one play, so the most recently played ranks first
+        assert [song["track"] for song in data[f"{period}_songs"]] == [
+            "Paranoid Android",
+            "Karma Police",
+            "Blood in the Cut",
+        ]
+
+
+def test_recent_stats_ranks_week_and_month_separately(client, test_db):
+    """Plays older than a week count towards the month ranking only."""
+    ten_days_ago = int(time.time()) - 10 * 86400
+    with sqlite3.connect(test_db) as conn:
+        conn.executemany(
+            "INSERT INTO musiclibrary (artist, album, track, timestamp, artist_key, album_key, track_key) "
+            "VALUES (?,?,?,?,?,?,?)",
+            [
+                (
+                    "K.Flay",
+                    "Solutions",
+                    "High Enough",
+                    ten_days_ago - i,
+                    normalize_name("K.Flay", "artist"),
+                    normalize_name("Solutions", "album"),
+                    normalize_name("High Enough", "track"),
+                )
+                for i in range(3)
+            ],
+        )
+
+    data = client.get("/recent-stats").json()
+
+    assert data["week_artists"] == [
+        {"artist": "Radiohead", "plays": 2},
+        {"artist": "K.Flay", "plays": 1},
+    ]
+    assert data["month_artists"][0] == {"artist": "K.Flay", "plays": 4}
+    assert data["month_songs"][0] == {
+        "artist": "K.Flay",
+        "track": "High Enough",
+        "plays": 3,
+    }
+    assert "Solutions" not in {a["album"] for a in data["week_albums"]}
+
+
+def test_all_time_page_renders_summary(client):
+    """Test that /all-time renders the dashboard summary stats."""
+    response = client.get("/all-time")
+    assert response.status_code == 200  # noqa: PLR2004
+    assert "Total Scrobbles" in response.text
+
+
+def test_top_artists_reuses_body_until_new_scrobbles(tmp_path, monkeypatch):
+    """The encoded /top-artists body is cached per data version."""
+    db = tmp_path / "cached.db"
+    monkeypatch.setattr(app_module, "DB_NAME", db)
+    app_module.init_db()
+    client = TestClient(app_module.app)
+
+    def add(artist, ts):
+        scrobble = {
+            "artist": {"#text": artist, "mbid": ""},
+            "album": {"#text": "", "mbid": ""},
+            "name": "Track",
+            "mbid": "",
+        }
+        with sqlite3.connect(db) as conn:
+            conn.execute(
+                app_module.SCROBBLE_INSERT_SQL, app_module.scrobble_row(scrobble, ts)
+            )
+
+    add("Radiohead", 1_700_000_000)
+    first = client.get("/top-artists")
+    misses = app_module._versioned_json.cache_info().misses
+    assert client.get("/top-artists").content == first.content
+    assert app_module._versioned_json.cache_info().misses == misses
+
+    add("K.Flay", 1_700_000_060)
+    artists = client.get("/top-artists").json()["artists"]
+    assert {a["artist"] for a in artists} == {"Radiohead", "K.Flay"}
+
+
+def test_lifespan_schedules_updates_when_configured(test_db, monkeypatch):
+    """UPDATE_INTERVAL_MINUTES starts an in-process update job with the app."""
+    calls = []
+    monkeypatch.setattr(app_module, "UPDATE_INTERVAL_MINUTES", 15)
+    monkeypatch.setattr(
+        app_module.GetScrobbles, "get_scrobbles", lambda _self: calls.append(1)
+    )
+
+    with TestClient(app_module.app) as client:
+        scheduler = client.app.state.scheduler
+        job = scheduler.get_job("scrobble_update")
+        assert job.trigger.interval.total_seconds() == 15 * 60  # noqa: PLR2004
+        client.portal.call(app_module._scheduled_update)
+
+    assert calls == [1]
+    assert not scheduler.running
@@ -0,0 +1,57 @@
+"""Tests for the gap checker."""
+
+import time
+
+from lytter import gap_checker
+from lytter.app import scrobble_row
+
+
+def test_find_timestamp_gaps_reports_large_gaps(test_db, monkeypatch):
+    """Only gaps above the threshold are reported, newest first."""
+    monkeypatch.setattr(gap_checker, "DB_NAME", test_db)
+
+    # Fixture scrobbles are 360s and 240s apart
+    gaps = gap_checker.find_timestamp_gaps(hours_back=1, gap_threshold=300)
+
+    assert len(gaps) == 1
+    now = int(time.time())
+    assert gaps[0]["gap_seconds"] == 360  # noqa: PLR2004
+    assert now - gaps[0]["newer_ts"] >= 120  # noqa: PLR2004
+    assert gaps[0]["newer_ts"] - gaps[0]["older_ts"] == gaps[0]["gap_seconds"]
+
+
+def test_find_timestamp_gaps_none_below_threshold(test_db, monkeypatch):
+    """No gaps are reported when every gap is below the threshold."""
+    monkeypatch.setattr(gap_checker, "DB_NAME", test_db)
+
+    assert gap_checker.find_timestamp_gaps(hours_back=1, gap_threshold=3600) == []
+
+
+def _fake_scrobble(track, timestamp):
+    return scrobble_row(
+        {
+            "artist": {"#text": "Radiohead", "mbid": ""},
+            "album": {"#text": "OK Computer", "mbid": ""},
+            "name": track,
+            "mbid": "",
+        },
+        timestamp,
+    )
+
+
+def test_fill_gaps_inserts_only_missing(test_db, monkeypatch):
+    """fill_gaps skips scrobbles already in the DB and inserts the rest."""
+    monkeypatch.setattr(gap_checker, "DB_NAME", test_db)
+    gaps = gap_checker.find_timestamp_gaps(hours_back=1, gap_threshold=300)
+    gap = gaps[0]
+    fetched = [
+        _fake_scrobble("Paranoid Android", gap["newer_ts"]),
+        _fake_scrobble("Airbag", gap["older_ts"] + 100),
+        _fake_scrobble("Lucky", gap["older_ts"] + 200),
+        _fake_scrobble("Karma Police", gap["older_ts"]),
+    ]
+    monkeypatch.setattr(gap_checker, "fetch_scrobbles_in_range", lambda *_: fetched)
+
+    assert gap_checker.fill_gaps(gaps, dry_run=True) == 2  # noqa: PLR2004
+    assert gap_checker.fill_gaps(gaps, dry_run=False) == 2  # noqa: PLR2004
+    assert gap_checker.fill_gaps(gaps, dry_run=True) == 0
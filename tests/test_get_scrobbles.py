@@ -0,0 +1,197 @@
+"""Tests for GetScrobbles against a fake Last.fm API."""
+
+import sqlite3
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import lytter.app as app_module
+from lytter.app import GetScrobbles, init_db
+
+BASE_TS = 1_700_000_000
+
+
+class _FakeResponse:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+def _track(i):
+    return {
+        "artist": {"#text": f"Artist {i % 3}", "mbid": ""},
+        "album": {"#text": f"Album {i % 5}", "mbid": ""},
+        "name": f"Track {i}",
+        "mbid": "",
+        "date": {"uts": str(BASE_TS - i * 60)},
+    }
+
+
+@pytest.fixture()
+def lastfm_pages(monkeypatch):
+    """Serve ``total`` scrobbles newest-first in pages, recording requested pages."""
+    state = {"total": 0, "requested": [], "started": [], "make_track": _track}
+
+    def fake_get(url, *args, params=None, **kwargs):
+        query = {k: v[0] for k, v in parse_qs(urlparse(url).query).items()}
+        query.update({k: str(v) for k, v in (params or {}).items()})
+        page, limit = int(query["page"]), int(query["limit"])
+        state["requested"].append(page)
+        state["started"].append(time.monotonic())
+        total_pages = max(1, -(-state["total"] // limit))
+        tracks = [
+            state["make_track"](i)
+            for i in range((page - 1) * limit, min(page * limit, state["total"]))
+        ]
+        return _FakeResponse(
+            {
+                "recenttracks": {
+                    "@attr": {"totalPages": str(total_pages)},
+                    "track": tracks,
+                }
+            }
+        )
+
+    monkeypatch.setattr(app_module.lastfm_session, "get", fake_get)
+    return state
+
+
+@pytest.fixture()
+def empty_db(tmp_path, monkeypatch):
+    """Empty, initialized database with DB_NAME monkeypatched."""
+    db = tmp_path / "scrobbles.db"
+    monkeypatch.setattr(app_module, "DB_NAME", db)
+    init_db()
+    return db
+
+
+def _count(db):
+    with sqlite3.connect(db) as conn:
+        return conn.execute("SELECT COUNT(*) FROM musiclibrary").fetchone()[0]
+
+
+def test_full_update_inserts_every_page(empty_db, lastfm_pages):
+    """A full update stores every scrobble across all pages."""
+    lastfm_pages["total"] = 450
+
+    added = GetScrobbles().get_scrobbles(full=True)
+
+    assert added == 450  # noqa: PLR2004
+    assert _count(empty_db) == 450  # noqa: PLR2004
+    assert sorted(lastfm_pages["requested"]) == [1, 2, 3]
+
+
+def test_incremental_update_adds_only_new(empty_db, lastfm_pages):
+    """A second incremental run adds nothing and stops after the first page."""
+    lastfm_pages["total"] = 250
+    GetScrobbles().get_scrobbles(full=True)
+    lastfm_pages["requested"].clear()
+
+    added = GetScrobbles().get_scrobbles()
+
+    assert added == 0
+    assert _count(empty_db) == 250  # noqa: PLR2004
+    assert max(lastfm_pages["requested"]) == 1
+
+
+def test_nowplaying_and_corrupt_timestamps_skipped(empty_db, lastfm_pages):
+    """Now-playing entries and pre-2000 timestamps are never stored."""
+
+    def track_with_extras(i):
+        item = _track(i)
+        if i == 0:
+            item["@attr"] = {"nowplaying": "true"}
+        elif i == 1:
+            item["date"] = {"uts": "1000"}
+        return item
+
+    lastfm_pages["total"] = 3
+    lastfm_pages["make_track"] = track_with_extras
+
+    added = GetScrobbles().get_scrobbles(full=True)
+
+    assert added == 1
+    assert _count(empty_db) == 1
+
+
+def test_parallel_page_fetches_are_paced(empty_db, lastfm_pages):
+    """Concurrent page requests start at least pause_duration apart."""
+    lastfm_pages["total"] = 1000
+    downloader = GetScrobbles()
+    downloader.pause_duration = 0.05
+
+    assert downloader.get_scrobbles(full=True) == 1000  # noqa: PLR2004
+
+    starts = sorted(lastfm_pages["started"])
+    gaps = [later - earlier for earlier, later in zip(starts, starts[1:], strict=False)]
+    assert min(gaps) >= 0.045  # noqa: PLR2004
+
+
+def test_lastfm_session_identifies_client():
+    """Last.fm requests carry the app's User-Agent instead of the requests default."""
+    assert app_module.lastfm_session.headers["User-Agent"] == app_module.USER_AGENT
+
+
+def test_explicit_connection_is_used(tmp_path, lastfm_pages, monkeypatch):
+    """Scrobbles are written through the connection passed to the constructor."""
+    db = tmp_path / "explicit.db"
+    monkeypatch.setattr(app_module, "DB_NAME", db)
+    init_db()
+    monkeypatch.setattr(app_module, "DB_NAME", tmp_path / "unused.db")
+    lastfm_pages["total"] = 10
+
+    added = GetScrobbles(conn=app_module.get_db_connection(db)).get_scrobbles()
+
+    assert added == 10  # noqa: PLR2004
+    assert _count(db) == 10  # noqa: PLR2004
+    assert not (tmp_path / "unused.db").exists()
+
+
+def test_batched_inserts_commit_every_batch(empty_db, lastfm_pages):
+    """With a batch size, pages are committed in batches rather than one by one."""
+    lastfm_pages["total"] = 1000
+    conn = app_module.get_db_connection(empty_db)
+    statements = []
+    conn.set_trace_callback(statements.append)
+    downloader = GetScrobbles(conn=conn)
+    downloader.pause_duration = 0
+    downloader.batch_size = 400
+
+    try:
+        added = downloader.get_scrobbles(full=True)
+    finally:
+        conn.set_trace_callback(None)
+
+    assert added == 1000  # noqa: PLR2004
+    assert _count(empty_db) == 1000  # noqa: PLR2004
+    # 200-row pages: commits after pages 2 and 4, then the final page
+    assert statements.count("COMMIT") == 3  # noqa: PLR2004
+
+
+def test_failed_page_keeps_earlier_uncommitted_pages(
+    empty_db, lastfm_pages, monkeypatch
+):
+    """A database error on one page only drops that page, not the pending batch."""
+    lastfm_pages["total"] = 1000
+    real_row = app_module.scrobble_row
+
+    def row_failing_on_page_3(scrobble, timestamp):
+        row = real_row(scrobble, timestamp)
+        # Track 450 is on page 3; a short row makes executemany raise
+        return row[:-1] if scrobble["name"] == "Track 450" else row
+
+    monkeypatch.setattr(app_module, "scrobble_row", row_failing_on_page_3)
+    downloader = GetScrobbles(conn=app_module.get_db_connection(empty_db))
+    downloader.pause_duration = 0
+    downloader.batch_size = 1000
+
+    added = downloader.get_scrobbles(full=True)
+
+    assert added == 800  # noqa: PLR2004
+    assert _count(empty_db) == 800  # noqa: PLR2004
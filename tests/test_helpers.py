@@ -1,10 +1,15 @@
 """Tests for helper functions in lytter.app."""
 
+import json
 import sqlite3
 import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
 
 import lytter.app as app_module
-from lytter.app import backfill_keys, init_db, normalize_name
+from lytter.app import CurrentStats, backfill_keys, init_db, normalize_name
 
 
 def test_get_dashboard_stats_counts(test_db):
@@ -185,3 +190,348 @@ def test_dashboard_stats_deduplicates_by_key(tmp_path, monkeypatch):
     assert stats["unique_artists"] == 1  # two raw variants = one key group
     assert stats["unique_tracks"] == 1
     assert stats["unique_albums"] == 1
+
+
+def test_timestamp_lookups_use_index(tmp_path, monkeypatch):
+    """Timestamp existence checks and range scans are served by an index."""
+    db = tmp_path / "plan.db"
+    monkeypatch.setattr(app_module, "DB_NAME", db)
+    init_db()
+
+    with sqlite3.connect(db) as conn:
+        queries = [
+            ("SELECT 1 FROM musiclibrary WHERE timestamp = ?", (1,)),
+            ("SELECT timestamp FROM musiclibrary WHERE timestamp > ?", (1,)),
+            ("SELECT timestamp FROM musiclibrary WHERE timestamp IN (?,?)", (1, 2)),
+        ]
+        for sql, params in queries:
+            plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            assert "USING COVERING INDEX" in plan[0][3]
+
+
+def test_fetch_and_cache_lyrics_skips_cached(tmp_path, monkeypatch):
+    """Cached lyrics are not looked up again and the Genius client is reused."""
+    db = tmp_path / "lyrics.db"
+    monkeypatch.setattr(app_module, "DB_NAME", db)
+    monkeypatch.setenv("GENIUS_TOKEN", "token")
+    init_db()
+
+    searches = []
+    clients = []
+
+    class FakeGenius:
+        def __init__(self, *args, **kwargs):
+            clients.append(self)
+
+        def search_song(self, track, artist):
+            searches.append((artist, track))
+
+    monkeypatch.setattr(app_module, "_lyricsgenius", type("M", (), {"Genius": FakeGenius}))
+    app_module._genius_client.cache_clear()
+
+    app_module.fetch_and_cache_lyrics("Radiohead", "Creep")
+    app_module.fetch_and_cache_lyrics("Radiohead", "Creep")
+    app_module.fetch_and_cache_lyrics("Radiohead", "Airbag")
+    app_module._genius_client.cache_clear()
+
+    assert searches == [("Radiohead", "Creep"), ("Radiohead", "Airbag")]
+    assert len(clients) == 1
+
+
+def test_artist_metadata_keeps_bio_when_similar_fails(tmp_path, monkeypatch):
+    """A failing similar-artists call does not discard the fetched bio."""
+    db = tmp_path / "meta.db"
+    monkeypatch.setattr(app_module, "DB_NAME", db)
+    init_db()
+
+    class FakeArtist:
+        def get_bio_summary(self):
+            return "<b>English</b> rock band"
+
+        def get_similar(self, limit):
+            raise RuntimeError("Last.fm is down")
+
+    fake = type("N", (), {"get_artist": lambda _self, _name: FakeArtist()})()
+    monkeypatch.setattr(app_module, "get_network", lambda: fake)
+
+    app_module.fetch_and_cache_artist_metadata("Radiohead")
+
+    with sqlite3.connect(db) as conn:
+        bio, similar = conn.execute(
+            "SELECT bio, similar_artists FROM artist_metadata WHERE artist = 'Radiohead'"
+        ).fetchone()
+    assert bio == "English rock band"
+    assert json.loads(similar) == []
+
+
+def test_top_songs_aggregates_in_sql(test_db):
+    """top_songs counts plays per track, most played last (top of the bars)."""
+    with sqlite3.connect(test_db) as conn:
+        conn.execute(
+            "INSERT INTO musiclibrary (artist, track, timestamp) VALUES (?, ?, ?)",
+            ("Radiohead", "Karma Police", int(time.time()) - 60),
+        )
+
+    fig = CurrentStats().top_songs("Radiohead")
+
+    assert fig["data"][0]["y"] == ["Paranoid Android", "Karma Police"]
+    assert fig["data"][0]["x"] == [1, 2]
+
+
+def test_top_songs_breaks_ties_by_first_stored(test_db):
+    """Songs with equal play counts keep a stable, first-stored-on-top order."""
+    with sqlite3.connect(test_db) as conn:
+        conn.execute(
+            "INSERT INTO musiclibrary (artist, track, timestamp) VALUES (?, ?, ?)",
+            ("Radiohead", "Airbag", int(time.time()) - 60),
+        )
+
+    fig = CurrentStats().top_songs("Radiohead")
+
+    assert fig["data"][0]["y"] == ["Airbag", "Karma Police", "Paranoid Android"]
+
+
+def test_listening_history_db_monthly_series(test_db):
+    """listening_history_db plots monthly plays with a 3-month average."""
+    with sqlite3.connect(test_db) as conn:
+        conn.executemany(
+            "INSERT INTO musiclibrary (artist, track, timestamp, artist_key) VALUES (?, ?, ?, ?)",
+            [
+                ("Radiohead", "Airbag", 1_609_459_200 + i, normalize_name("Radiohead", "artist"))  # 2021-01-01
+                for i in range(4)
+            ],
+        )
+
+    fig = CurrentStats().listening_history_db("Radiohead")
+
+    bars, avg = fig["data"]
+    assert bars["x"][0] == "2021-01-01T00:00:00"
+    assert list(bars["y"]) == [4, 2]
+    assert list(avg["y"]) == [3.0, 3.0]
+    month = time.strftime("%Y-%m", time.gmtime())
+    assert fig["layout"]["xaxis"]["range"] == [
+        f"{int(month[:4]) - 3}{month[4:]}-01",
+        f"{month}-01",
+    ]
+
+
+def test_artist_history_uses_covering_index(tmp_path, monkeypatch):
+    """Per-artist monthly history is answered from the (artist_key, timestamp) index."""
+    db = tmp_path / "plan.db"
+    monkeypatch.setattr(app_module, "DB_NAME", db)
+    init_db()
+
+    with sqlite3.connect(db) as conn:
+        plan = conn.execute(
+            """EXPLAIN QUERY PLAN
+               SELECT strftime('%Y-%m', timestamp, 'unixepoch') AS month, COUNT(*)
+               FROM musiclibrary WHERE artist_key = ? GROUP BY month""",
+            ("radiohead",),
+        ).fetchall()
+    assert any("COVERING INDEX idx_artist_key_timestamp" in row[3] for row in plan)
+
+
+def test_album_tracks_uses_covering_index(tmp_path, monkeypatch):
+    """Album track listings are answered from the (artist, album, track) index."""
+    db = tmp_path / "plan.db"
+    monkeypatch.setattr(app_module, "DB_NAME", db)
+    init_db()
+
+    with sqlite3.connect(db) as conn:
+        plan = conn.execute(
+            """EXPLAIN QUERY PLAN
+               SELECT track, COUNT(*) FROM musiclibrary
+               WHERE artist = ? AND album = ? GROUP BY track""",
+            ("Radiohead", "OK Computer"),
+        ).fetchall()
+    assert any("COVERING INDEX idx_artist_album" in row[3] for row in plan)
+
+
+def test_get_db_connection_reused_per_thread(tmp_path):
+    """The same thread gets the same connection back; other threads get their own."""
+    db = tmp_path / "conn.db"
+    conn = app_module.get_db_connection(db)
+
+    assert app_module.get_db_connection(db) is conn
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        other = executor.submit(app_module.get_db_connection, db).result()
+    assert other is not conn
+
+
+def test_close_db_connections_only_closes_that_path(tmp_path):
+    """Closing one database's connections leaves the others cached and open."""
+    db, other_db = tmp_path / "a.db", tmp_path / "b.db"
+    conn = app_module.get_db_connection(db)
+    other = app_module.get_db_connection(other_db)
+
+    app_module.close_db_connections(db)
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    assert app_module.get_db_connection(other_db) is other
+    reopened = app_module.get_db_connection(db)
+    assert reopened is not conn
+    assert reopened.execute("SELECT 1").fetchone() == (1,)
+
+
+def test_stats_summary_tracks_writes(tmp_path, monkeypatch):
+    """Trigger-maintained library counts match a fresh scan after every kind of write."""
+    db = tmp_path / "summary.db"
+    monkeypatch.setattr(app_module, "DB_NAME", db)
+    init_db()
+
+    def live_counts(conn):
+        return dict(
+            zip(
+                ("total_scrobbles", "unique_artists", "unique_tracks", "unique_albums"),
+                conn.execute(
+                    "SELECT COUNT(*), COUNT(DISTINCT artist_key), COUNT(DISTINCT track_key), "
+                    "COUNT(DISTINCT NULLIF(album_key, '')) FROM musiclibrary"
+                ).fetchone(),
+                strict=True,
+            )
+        )
+
+    def row(artist, album, track, ts):
+        scrobble = {
+            "artist": {"#text": artist, "mbid": ""},
+            "album": {"#text": album, "mbid": ""},
+            "name": track,
+            "mbid": "",
+        }
+        return app_module.scrobble_row(scrobble, ts)
+
+    with sqlite3.connect(db) as conn:
+        conn.executemany(
+            app_module.SCROBBLE_INSERT_SQL,
+            [
+                row("Radiohead", "OK Computer", "Airbag", 1),
+                row("Radiohead", "OK Computer", "Airbag", 2),
+                row("radiohead", "Kid A", "Idioteque", 3),
+                row("Björk", "", "Jóga", 4),
+                row("Björk", "", "Jóga", 4),  # ignored duplicate timestamp
+            ],
+        )
+        conn.commit()
+        assert app_module.library_counts(conn) == live_counts(conn) == {
+            "total_scrobbles": 4,
+            "unique_artists": 2,
+            "unique_tracks": 3,
+            "unique_albums": 2,
+        }
+
+        conn.execute("DELETE FROM musiclibrary WHERE timestamp IN (1, 3)")
+        conn.execute(
+            "INSERT INTO musiclibrary (artist, album, track, timestamp) "
+            "VALUES ('Portishead', 'Dummy', 'Roads', 5)"
+        )
+        backfill_keys(conn)
+        assert app_module.library_counts(conn) == live_counts(conn)
+
+
+def test_data_version_bumps_on_writes_only(tmp_path, monkeypatch):
+    """data_version changes on real writes, not on ignored duplicates or reads."""
+    db = tmp_path / "version.db"
+    monkeypatch.setattr(app_module, "DB_NAME", db)
+    init_db()
+    row = app_module.scrobble_row(
+        {
+            "artist": {"#text": "Radiohead", "mbid": ""},
+            "album": {"#text": "OK Computer", "mbid": ""},
+            "name": "Airbag",
+            "mbid": "",
+        },
+        1_700_000_000,
+    )
+
+    with sqlite3.connect(db) as conn:
+        start = app_module._data_version(conn)
+        conn.execute(app_module.SCROBBLE_INSERT_SQL, row)
+        after_insert = app_module._data_version(conn)
+        conn.execute(app_module.SCROBBLE_INSERT_SQL, row)
+        conn.execute("SELECT COUNT(*) FROM musiclibrary").fetchone()
+
+        assert after_insert > start
+        assert app_module._data_version(conn) == after_insert
+
+
+def test_rolling_mean_matches_pandas():
+    """_rolling_mean reproduces pandas' centred rolling mean with min_periods=1."""
+    pd = pytest.importorskip("pandas")
+    values = [3, 0, 7, 1, 1, 12, 4, 0, 0, 9, 2]
+    for window in (3, 4, 7, 20):
+        expected = pd.Series(values).rolling(window, center=True, min_periods=1).mean()
+        assert app_module._rolling_mean(values, window) == pytest.approx(expected.tolist())
+    assert app_module._rolling_mean([], 7) == []
+
+
+def test_search_artists_index_refreshes_on_new_scrobbles(tmp_path, monkeypatch):
+    """The normalised artist list is reused until a scrobble bumps the data version."""
+    db = tmp_path / "search.db"
+    monkeypatch.setattr(app_module, "DB_NAME", db)
+    init_db()
+    app_module._artist_search_index.cache_clear()
+
+    def add(artist, ts):
+        scrobble = {
+            "artist": {"#text": artist, "mbid": ""},
+            "album": {"#text": "", "mbid": ""},
+            "name": "Track",
+            "mbid": "",
+        }
+        with sqlite3.connect(db) as conn:
+            conn.execute(app_module.SCROBBLE_INSERT_SQL, app_module.scrobble_row(scrobble, ts))
+
+    add("Motörhead", 1_700_000_000)
+    assert [r["artist"] for r in app_module.search_artists("motor")["results"]] == ["Motörhead"]
+    app_module.search_artists("head")
+    assert app_module._artist_search_index.cache_info().misses == 1
+
+    add("Radiohead", 1_700_000_060)
+    results = app_module.search_artists("head")["results"]
+    assert {r["artist"] for r in results} == {"Motörhead", "Radiohead"}
+    assert app_module._artist_search_index.cache_info().misses == 2  # noqa: PLR2004
+    app_module._artist_search_index.cache_clear()
+
+
+def test_search_artists_single_fuzzy_pass(test_db):
+    """Substring hits score 100 and are ordered by plays; typos still match."""
+    with sqlite3.connect(test_db) as conn:
+        conn.execute(
+            "INSERT INTO musiclibrary (artist, track, timestamp) VALUES (?, ?, ?)",
+            ("Radiohead", "Airbag", int(time.time()) - 30),
+        )
+
+    results = app_module.search_artists("RADIO")["results"]
+    assert results[0] == {"artist": "Radiohead", "plays": 3, "similarity": 100.0}
+
+    results = app_module.search_artists("radiohed")["results"]
+    assert results[0]["artist"] == "Radiohead"
+    assert 60 <= results[0]["similarity"] < 100  # noqa: PLR2004
+
+
+def test_normalize_text_strips_marks_only():
+    """Accents are removed, other scripts are kept and repeat calls hit the cache."""
+    app_module.normalize_text.cache_clear()
+    assert app_module.normalize_text("Motörhead") == "Motorhead"
+    assert app_module.normalize_text("坂本龍一") == "坂本龍一"
+    assert app_module.normalize_text("Björk Guðmundsdóttir") == "Bjork Guðmundsdottir"
+    app_module.normalize_text("Motörhead")
+    assert app_module.normalize_text.cache_info().hits == 1
+
+
+def test_normalize_text_matches_category_filter():
+    """The U+0300 shortcut strips exactly the Mn characters a full scan would."""
+    text = "".join(chr(cp) for cp in range(0x20, 0x3000))
+    nfd = unicodedata.normalize("NFD", text)
+    expected = "".join(c for c in nfd if unicodedata.category(c) != "Mn")
+    assert app_module.normalize_text(text) == expected
+
+
+def test_dumps_json_is_compact(monkeypatch):
+    """Chart payloads serialise without padding, with or without orjson."""
+    figure = {"data": [{"x": ["2024-01-01", "2024-01-02"], "y": [1, 2]}], "layout": {}}
+    monkeypatch.setattr(app_module, "_orjson", None)
+    encoded = app_module._dumps_json(figure)
+    assert " " not in encoded
+    assert json.loads(encoded) == figure